@@ -0,0 +1,104 @@
+"""Group trail-camera frames into bursts.
+
+Cameras fire 3-10 frames per trigger and number them consecutively
+(`IMG_0012.JPG`, `IMG_0013.JPG`, ...) within one folder. Two frames belong to
+the same burst when they sit in the same folder, their file numbers are
+consecutive and their capture times are a few seconds apart at most.
+"""
+
+import os
+import re
+import threading
+
+from image_metadata import read_capture_time
+
+
+# Trailing frame number of a file stem, e.g. ("IMG_", "0013") for IMG_0013.
+SEQUENCE_RE = re.compile(r"^(.*?)(\d+)$")
+
+
+def sequence_parts(path: str):
+    """Split a path into (folder, prefix, number, digits, extension), or None without a number."""
+    folder, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    match = SEQUENCE_RE.match(stem)
+    if match is None:
+        return None
+    prefix, digits = match.groups()
+    return folder, prefix, int(digits), len(digits), ext
+
+
+class BurstIndex:
+    def __init__(self, max_gap_s: float = 5.0, max_burst_frames: int = 10):
+        # Frames of one burst are at most this many seconds apart.
+        self.max_gap_s = max_gap_s
+        self.max_burst_frames = max_burst_frames
+        # path -> capture time; EXIF is read once per image.
+        self.capture_times = {}
+        # Viewer navigation and prefetch workers both ask.
+        self.lock = threading.Lock()
+
+    def capture_time(self, path: str) -> float:
+        with self.lock:
+            cached = self.capture_times.get(path)
+        if cached is not None:
+            return cached
+
+        capture_time = read_capture_time(path)
+        with self.lock:
+            self.capture_times[path] = capture_time
+        return capture_time
+
+    def same_burst(self, first: str, second: str) -> bool:
+        """True when two frames were shot by one trigger."""
+        first_parts = sequence_parts(first)
+        second_parts = sequence_parts(second)
+        if first_parts is None or second_parts is None:
+            return False
+
+        folder_a, prefix_a, number_a, _, _ = first_parts
+        folder_b, prefix_b, number_b, _, _ = second_parts
+        if folder_a != folder_b or prefix_a != prefix_b or abs(number_a - number_b) != 1:
+            return False
+
+        return abs(self.capture_time(first) - self.capture_time(second)) <= self.max_gap_s
+
+    def previous_frame(self, path: str) -> str | None:
+        """The frame to track path from, or None when path should be a keyframe.
+
+        Runs longer than max_burst_frames (e.g. time-lapse at short intervals)
+        are not chained further, so tracking never drifts through a whole card.
+        """
+        previous = self.previous_sibling(path)
+        walker = previous
+        for _ in range(self.max_burst_frames - 1):
+            if walker is None:
+                return previous
+            walker = self.previous_sibling(walker)
+        return None if walker is not None else previous
+
+    def previous_sibling(self, path: str) -> str | None:
+        """The frame shot just before path in the same burst, if it exists on disk."""
+        parts = sequence_parts(path)
+        if parts is None or parts[2] == 0:
+            return None
+
+        folder, prefix, number, digits, ext = parts
+        candidate = os.path.join(folder, f"{prefix}{number - 1:0{digits}d}{ext}")
+        if not os.path.exists(candidate) or not self.same_burst(candidate, path):
+            return None
+        return candidate
+
+    def group(self, paths) -> list[list[str]]:
+        """Split an ordered list of paths into consecutive bursts of at most max_burst_frames."""
+        bursts = []
+        for path in paths:
+            if (
+                bursts
+                and len(bursts[-1]) < self.max_burst_frames
+                and self.same_burst(bursts[-1][-1], path)
+            ):
+                bursts[-1].append(path)
+            else:
+                bursts.append([path])
+        return bursts
@@ -0,0 +1,161 @@
+"""Content-addressed index of the verified dataset.
+
+The same frame often reaches the dataset twice, e.g. from an SD card copied
+again under a different folder name, which gives it a different dataset
+filename. This index maps file content to the dataset entry that holds it,
+so verifying a byte-identical image reuses that entry (and its label) and
+only records the new name as an alias.
+
+Entries are keyed by the cheap `fast_file_digest`; the full digest is only
+computed, and stored, once two files share a fast digest and have to be
+proven identical.
+"""
+
+from pathlib import Path
+import sqlite3
+import threading
+
+from file_hashing import fast_file_digest, full_file_digest
+
+
+class ContentIndex:
+    def __init__(self, images_dir: Path, db_path=None, in_flight=None):
+        self.images_dir = Path(images_dir)
+        # name -> source path of an entry whose copy is still queued, else None.
+        self.in_flight = in_flight or (lambda name: None)
+        base_dir = Path.cwd()
+        self.db_path = Path(db_path) if db_path else base_dir / "verified_images" / "content_index.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Dataset writer threads claim entries concurrently; lookup + insert must be atomic.
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " name TEXT PRIMARY KEY,"
+            " fast_digest TEXT NOT NULL,"
+            " full_digest TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_fast ON entries(fast_digest)")
+        # Dataset names whose content is stored under another entry.
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS aliases ("
+            " alias TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS aliases_name ON aliases(name)")
+        self.conn.commit()
+
+    def match(self, name: str, source_path, fast: str):
+        """(entry holding source's bytes or None, source's full digest if computed); lock held."""
+        rows = self.conn.execute(
+            "SELECT name, full_digest FROM entries WHERE fast_digest = ? AND name != ?",
+            (fast, name),
+        ).fetchall()
+
+        full = None
+        for candidate, candidate_full in rows:
+            candidate_path = self.images_dir / candidate
+            if not candidate_path.exists():
+                # Its copy may still be queued; compare against the source instead.
+                candidate_path = self.in_flight(candidate)
+                if candidate_path is None or not Path(candidate_path).exists():
+                    # Removed outside the app, or its copy never finished.
+                    self.conn.execute("DELETE FROM entries WHERE name = ?", (candidate,))
+                    continue
+
+            if candidate_full is None:
+                candidate_full = full_file_digest(candidate_path)
+                self.conn.execute(
+                    "UPDATE entries SET full_digest = ? WHERE name = ?",
+                    (candidate_full, candidate),
+                )
+            if full is None:
+                full = full_file_digest(source_path)
+
+            if candidate_full == full:
+                return candidate, full
+        return None, full
+
+    def claim(self, name: str, source_path) -> str:
+        """Return the dataset entry already holding source's bytes, or register name for them."""
+        fast = fast_file_digest(source_path)
+
+        with self.lock:
+            entry, full = self.match(name, source_path, fast)
+            if entry is not None:
+                self.conn.commit()
+                return entry
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (name, fast_digest, full_digest) VALUES (?, ?, ?)",
+                (name, fast, full),
+            )
+            self.conn.execute("DELETE FROM aliases WHERE alias = ?", (name,))
+            self.conn.commit()
+            return name
+
+    def add_alias(self, alias: str, name: str) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO aliases (alias, name) VALUES (?, ?)",
+                (alias, name),
+            )
+            self.conn.commit()
+
+    def resolve(self, name: str) -> str:
+        """The dataset entry that stores name's image and label."""
+        with self.lock:
+            row = self.conn.execute("SELECT name FROM aliases WHERE alias = ?", (name,)).fetchone()
+        return row[0] if row else name
+
+    def aliases_of(self, names) -> dict:
+        """{alias: entry} for every alias pointing at one of names."""
+        names = set(names)
+        with self.lock:
+            rows = self.conn.execute("SELECT alias, name FROM aliases").fetchall()
+        return {alias: name for alias, name in rows if name in names}
+
+    def remove_alias(self, alias: str) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM aliases WHERE alias = ?", (alias,))
+            self.conn.commit()
+
+    def remove_entry(self, name: str) -> list[str]:
+        """Forget an entry and its aliases; returns the aliases that went with it."""
+        with self.lock:
+            aliases = [
+                row[0] for row in self.conn.execute(
+                    "SELECT alias FROM aliases WHERE name = ?", (name,)
+                )
+            ]
+            self.conn.execute("DELETE FROM aliases WHERE name = ?", (name,))
+            self.conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+            self.conn.commit()
+        return aliases
+
+    def promote(self, name: str, heir: str) -> None:
+        """Make alias heir the entry for name's content; name's other aliases follow it."""
+        with self.lock:
+            self.conn.execute("DELETE FROM entries WHERE name = ?", (heir,))
+            self.conn.execute("UPDATE entries SET name = ? WHERE name = ?", (heir, name))
+            self.conn.execute("DELETE FROM aliases WHERE alias = ?", (heir,))
+            self.conn.execute("UPDATE aliases SET name = ? WHERE name = ?", (heir, name))
+            self.conn.commit()
+
+    def register(self, rows) -> None:
+        """Store (name, fast digest, full digest or None) rows found by a dataset scan."""
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (name, fast_digest, full_digest) VALUES (?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            aliases = self.conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0]
+        return {"entries": entries, "aliases": aliases}
@@ -0,0 +1,205 @@
+"""Write-ahead journal for verified dataset mutations.
+
+Every verify, unverify or relabel is logged here, with everything needed to
+redo it, before any dataset file is touched. The dataset files themselves are
+written under a temporary name and renamed into place, label first, so the
+trainer never sees an image without its label.
+
+Durability is batched:
+
+- intents appended by concurrent writers share one fsync (group commit); the
+  first writer to arrive flushes everything queued behind it
+- applied operations are not fsynced one by one; `checkpoint()` syncs the
+  files of a whole batch and then drops their intents from the journal
+
+After a crash `outstanding()` returns the intents that were logged but never
+checkpointed, and `TrainingManager` redoes them (each operation is idempotent).
+"""
+
+from pathlib import Path
+import json
+import os
+import threading
+
+
+def fsync_path(path: Path) -> None:
+    """Flush a file or directory to disk, ignoring platforms that cannot sync directories."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class DatasetJournal:
+    def __init__(self, path: Path, checkpoint_every: int = 256):
+        self.path = Path(path)
+        # Applied operations between checkpoints (one fsync pass over their files).
+        self.checkpoint_every = checkpoint_every
+
+        self.lock = threading.Lock()
+        self.committed = threading.Condition(self.lock)
+
+        # Logged and not yet checkpointed, restored from disk first.
+        self.pending = {record["txn"]: record for record in self.read_records()}
+        self.next_txn = max(self.pending, default=0)
+        self.durable_txn = self.next_txn
+
+        # Records waiting for the next group commit, and whether one is running.
+        self.buffer = []
+        self.writing = False
+
+        # txn -> files to sync at the next checkpoint.
+        self.applied = {}
+
+        self.commits = 0
+        self.records = 0
+
+        self.file = self.path.open("a", encoding="utf-8")
+
+    def read_records(self) -> list[dict]:
+        records = []
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                for raw in f:
+                    try:
+                        records.append(json.loads(raw))
+                    except ValueError:
+                        # Torn final line: that intent never became durable, so it was never applied.
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def outstanding(self) -> list[dict]:
+        """Intents logged but not checkpointed, oldest first."""
+        with self.lock:
+            return [self.pending[txn] for txn in sorted(self.pending)]
+
+    def log(self, record: dict) -> dict:
+        """Durably log one intent; returns the record with its txn id."""
+        return self.log_many([record])[0]
+
+    def log_many(self, records: list[dict]) -> list[dict]:
+        """Durably log several intents, sharing fsyncs with concurrent callers."""
+        with self.lock:
+            logged = []
+            for record in records:
+                self.next_txn += 1
+                record = {**record, "txn": self.next_txn}
+                self.buffer.append(record)
+                self.pending[record["txn"]] = record
+                logged.append(record)
+
+            if not logged:
+                return logged
+            last = logged[-1]["txn"]
+
+            while self.durable_txn < last:
+                if self.writing:
+                    # Another writer is flushing; our records go out with it or the next group.
+                    self.committed.wait()
+                    continue
+
+                batch, self.buffer = self.buffer, []
+                self.writing = True
+                self.lock.release()
+                try:
+                    self.file.write("".join(json.dumps(record) + "\n" for record in batch))
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+                except Exception:
+                    self.lock.acquire()
+                    self.writing = False
+                    # Our own records are dropped (the caller sees the error); others retry.
+                    own = {record["txn"] for record in logged}
+                    for txn in own:
+                        self.pending.pop(txn, None)
+                    self.buffer[:0] = [record for record in batch if record["txn"] not in own]
+                    self.committed.notify_all()
+                    raise
+
+                self.lock.acquire()
+                self.writing = False
+                self.durable_txn = max(self.durable_txn, batch[-1]["txn"])
+                self.commits += 1
+                self.records += len(batch)
+                self.committed.notify_all()
+
+            return logged
+
+    def mark_applied(self, txn: int, paths) -> None:
+        """Record that txn's files are written; checkpoints once enough have piled up."""
+        with self.lock:
+            self.applied[txn] = list(paths)
+            due = len(self.applied) >= self.checkpoint_every
+
+        if due:
+            self.checkpoint()
+
+    def abort(self, txn: int) -> None:
+        """Forget an intent that failed for good so recovery does not redo it."""
+        with self.lock:
+            self.pending.pop(txn, None)
+            self.applied.pop(txn, None)
+        self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """Sync applied files, then rewrite the journal without their intents."""
+        with self.lock:
+            applied, self.applied = self.applied, {}
+
+        # One pass over the batch: files first, then the directories holding their names.
+        directories = set()
+        for paths in applied.values():
+            for path in paths:
+                path = Path(path)
+                if path.exists():
+                    fsync_path(path)
+                directories.add(path.parent)
+        for directory in directories:
+            fsync_path(directory)
+
+        with self.lock:
+            while self.writing:
+                self.committed.wait()
+
+            for txn in applied:
+                self.pending.pop(txn, None)
+
+            # Keep intents that are durable but still being applied; buffered ones are
+            # written to the new file by the next group commit.
+            buffered = {record["txn"] for record in self.buffer}
+            keep = [
+                self.pending[txn] for txn in sorted(self.pending)
+                if txn not in buffered
+            ]
+
+            tmp = self.path.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in keep))
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.file.close()
+            tmp.replace(self.path)
+            fsync_path(self.path.parent)
+            self.file = self.path.open("a", encoding="utf-8")
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "records": self.records,
+                "commits": self.commits,
+                "records_per_fsync": self.records / self.commits if self.commits else 0.0,
+                "outstanding": len(self.pending),
+            }
+
+    def close(self) -> None:
+        self.checkpoint()
+        self.file.close()
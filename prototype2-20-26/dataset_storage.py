@@ -0,0 +1,150 @@
+"""Materialise verified images in the dataset without duplicating the bytes.
+
+A dataset image can be stored three ways, tried in this order:
+
+- `reflink`: a copy-on-write clone (Btrfs, XFS, APFS-style filesystems via
+  FICLONE); independent file, no extra space until one side changes
+- `hardlink`: a second name for the source file's inode
+- `copy`: a full byte copy, used when the source lives on another device
+  (the usual SD card / USB drive case) or the filesystem refuses links
+
+The working mode is detected per source device on first use and remembered,
+so each later image costs one syscall. Removing a dataset entry only ever
+unlinks the dataset name; the source file is never touched.
+"""
+
+from pathlib import Path
+import errno
+import os
+import shutil
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no FICLONE, hardlinks still work on NTFS.
+    fcntl = None
+
+
+STORAGE_MODES = ("reflink", "hardlink", "copy")
+
+# ioctl request number for FICLONE on Linux.
+FICLONE = 0x40049409
+
+
+def reflink(source: Path, destination: Path) -> None:
+    """Clone source into a new destination file sharing its extents."""
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+
+    try:
+        with open(source, "rb") as src, open(destination, "xb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        Path(destination).unlink(missing_ok=True)
+        raise
+
+    shutil.copystat(source, destination)
+
+
+def hardlink(source: Path, destination: Path) -> None:
+    os.link(source, destination)
+
+
+def copy(source: Path, destination: Path) -> None:
+    shutil.copy2(source, destination)
+
+
+MATERIALIZERS = {"reflink": reflink, "hardlink": hardlink, "copy": copy}
+
+
+class DatasetStorage:
+    def __init__(self, dataset_dir: Path, mode: str = "auto"):
+        self.dataset_dir = Path(dataset_dir)
+        # "auto" detects per device; a concrete mode is tried first and still falls back.
+        self.mode = mode
+        self.dataset_device = os.stat(self.dataset_dir).st_dev
+
+        # source device -> first mode that worked from it.
+        self.device_modes = {}
+        self.counts = {name: 0 for name in STORAGE_MODES}
+        self.lock = threading.Lock()
+
+    def candidates(self, source: Path) -> list[str]:
+        """Modes worth trying for source, best first."""
+        device = os.stat(source).st_dev
+        if device != self.dataset_device:
+            # Links cannot cross filesystems.
+            return ["copy"]
+
+        with self.lock:
+            known = self.device_modes.get(device)
+        if known is not None:
+            return list(STORAGE_MODES[STORAGE_MODES.index(known):])
+        if self.mode in STORAGE_MODES:
+            return list(STORAGE_MODES[STORAGE_MODES.index(self.mode):])
+        return list(STORAGE_MODES)
+
+    def materialize(self, source, destination) -> str:
+        """Create destination from source with the cheapest working mode; returns the mode."""
+        source = Path(source)
+        destination = Path(destination)
+
+        last_error = None
+        for name in self.candidates(source):
+            try:
+                MATERIALIZERS[name](source, destination)
+            except OSError as e:
+                if name == "copy":
+                    raise
+                # EXDEV, EPERM (FAT/exFAT), EOPNOTSUPP, EMLINK: next mode down.
+                last_error = e
+                continue
+
+            with self.lock:
+                self.device_modes.setdefault(os.stat(source).st_dev, name)
+                self.counts[name] += 1
+            return name
+
+        raise last_error
+
+    def mode_for(self, source) -> str:
+        """The mode the next materialisation of source is expected to use."""
+        try:
+            return self.candidates(Path(source))[0]
+        except OSError:
+            return "copy"
+
+    def detect(self, source_dir) -> str:
+        """Probe which mode works from source_dir into the dataset, and remember it."""
+        source_dir = Path(source_dir)
+        try:
+            if os.stat(source_dir).st_dev != self.dataset_device:
+                return "copy"
+        except OSError:
+            return "copy"
+
+        # Probe beside the images dir, not in it: its mtime gates the verified-cache rescan.
+        probe = self.dataset_dir.parent / ".storage_probe"
+        target = self.dataset_dir.parent / ".storage_probe.link"
+        try:
+            probe.write_bytes(b"probe")
+            for name in self.candidates(probe):
+                try:
+                    MATERIALIZERS[name](probe, target)
+                except OSError:
+                    continue
+                finally:
+                    target.unlink(missing_ok=True)
+
+                with self.lock:
+                    self.device_modes.setdefault(self.dataset_device, name)
+                return name
+        finally:
+            probe.unlink(missing_ok=True)
+        return "copy"
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"mode": self.mode, "materialized": dict(self.counts), "devices": dict(self.device_modes)}
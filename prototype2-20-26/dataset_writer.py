@@ -0,0 +1,108 @@
+"""Write-behind queue for verified dataset file operations.
+
+Copying a multi-megabyte JPEG off a USB card reader and writing its label
+should not stall the Qt thread on every Enter press. Operations are queued
+here and run on a small thread pool instead:
+
+- bounded concurrency (a couple of workers is enough to keep the disk busy)
+- operations on the same dataset file run strictly in submission order, so
+  a verify followed by an unverify can never be applied backwards
+- failures are retried with backoff before being reported
+- `pending` and the change callback feed a visible counter in the UI
+- `flush()` blocks until everything queued has been written (window close)
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class DatasetWriter:
+    def __init__(self, max_workers: int = 2, retries: int = 3, retry_delay: float = 0.25):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataset-writer")
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        # key -> operations waiting behind the one currently running for that key.
+        self.queues = {}
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+
+        # Called from worker threads: on_change(pending count), on_error(key, error).
+        self.on_change = None
+        self.on_error = None
+
+    def submit(self, key: str, operation, on_failure=None) -> None:
+        """Queue `operation()` for key; `on_failure(error)` runs if every retry fails."""
+        with self.lock:
+            self.pending += 1
+            pending = self.pending
+
+            queue = self.queues.get(key)
+            if queue is not None:
+                # Something for this key is running; the worker picks this up next.
+                queue.append((operation, on_failure))
+                start = False
+            else:
+                self.queues[key] = deque()
+                start = True
+
+        if start:
+            self.pool.submit(self.run_key, key, operation, on_failure)
+        self.notify(pending)
+
+    def run_key(self, key: str, operation, on_failure) -> None:
+        """Run operations for one key back to back until its queue is empty."""
+        while True:
+            self.run_with_retry(key, operation, on_failure)
+
+            with self.lock:
+                self.pending -= 1
+                pending = self.pending
+                queue = self.queues[key]
+                if queue:
+                    operation, on_failure = queue.popleft()
+                else:
+                    del self.queues[key]
+                    operation = None
+                if self.pending == 0:
+                    self.idle.notify_all()
+
+            self.notify(pending)
+            if operation is None:
+                return
+
+    def run_with_retry(self, key: str, operation, on_failure) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                operation()
+                return
+            except Exception as e:
+                if attempt < self.retries:
+                    # Card readers drop out briefly; give them a moment before retrying.
+                    time.sleep(self.retry_delay * (2 ** attempt))
+                    continue
+
+                print(f"Dataset write failed for {key}: {e}")
+                if on_failure is not None:
+                    try:
+                        on_failure(e)
+                    except Exception as callback_error:
+                        print(f"Dataset write failure handler raised: {callback_error}")
+                if self.on_error is not None:
+                    self.on_error(key, str(e))
+
+    def notify(self, pending: int) -> None:
+        if self.on_change is not None:
+            self.on_change(pending)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every queued operation has finished; False on timeout."""
+        with self.lock:
+            return self.idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def close(self) -> None:
+        self.flush()
+        self.pool.shutdown(wait=True)
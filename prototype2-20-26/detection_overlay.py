@@ -0,0 +1,93 @@
+"""Vector drawing of detection boxes on display-sized pixmaps.
+
+Boxes are painted with QPainter in display coordinates from each detection's
+normalized `bbox_xywhn`, so selecting or deleting a detection repaints a
+1000x700 pixmap instead of re-rendering the full camera frame.
+"""
+
+from PySide6.QtCore import QRectF, Qt
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen, QPixmap
+
+
+# Ultralytics' default class palette, so model predictions keep familiar colours.
+PALETTE = [
+    "#042AFF", "#0BDBEB", "#F3F3F3", "#00DFB7", "#111F68",
+    "#FF6FDD", "#FF444F", "#CCED00", "#00F344", "#BD00FF",
+    "#00B4FF", "#DD00BA", "#00FFFF", "#26C000", "#01FFB3",
+    "#7D24FF", "#7B0068", "#FF1B6C", "#FC6D2F", "#A2FF0B",
+]
+
+VERIFIED_COLOR = QColor(0, 255, 0)
+DELETED_COLOR = QColor(255, 0, 0)
+
+
+def class_color(class_id: int) -> QColor:
+    return QColor(PALETTE[int(class_id) % len(PALETTE)])
+
+
+def box_rect(bbox_xywhn, width: int, height: int) -> QRectF:
+    """Map a YOLO normalized center/size box onto a pixmap of the given size."""
+    x_center, y_center, box_w, box_h = bbox_xywhn
+    return QRectF(
+        (x_center - box_w / 2.0) * width,
+        (y_center - box_h / 2.0) * height,
+        box_w * width,
+        box_h * height,
+    )
+
+
+def paint_detections(base: QPixmap, detections, verified: bool) -> QPixmap:
+    """Return a copy of base with every detection box and its label drawn on it."""
+    pixmap = base.copy()
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+    font = QFont()
+    font.setPointSize(9)
+    painter.setFont(font)
+    metrics = QFontMetrics(font)
+
+    for det in detections:
+        color = VERIFIED_COLOR if verified else class_color(det["class_id"])
+        rect = box_rect(det["bbox_xywhn"], pixmap.width(), pixmap.height())
+
+        painter.setPen(QPen(color, 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(rect)
+
+        # Verified labels are ground truth; predictions also show their confidence.
+        if verified:
+            text = det["class_name"]
+        else:
+            text = f"{det['class_name']} {det['confidence']:.2f}"
+
+        text_w = metrics.horizontalAdvance(text) + 6
+        text_h = metrics.height() + 2
+        top = rect.top() - text_h if rect.top() >= text_h else rect.top()
+        label_rect = QRectF(rect.left(), top, text_w, text_h)
+
+        painter.fillRect(label_rect, color)
+        painter.setPen(QColor(0, 0, 0) if color.lightness() > 127 else QColor(255, 255, 255))
+        painter.drawText(label_rect, Qt.AlignmentFlag.AlignCenter, text)
+
+    painter.end()
+    return pixmap
+
+
+def paint_highlights(overlay: QPixmap, selected_box=None, selected_color=None, deleted_boxes=()) -> QPixmap:
+    """Return a copy of overlay with the selected and deleted boxes outlined."""
+    pixmap = overlay.copy()
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setBrush(Qt.BrushStyle.NoBrush)
+
+    if selected_box is not None:
+        painter.setPen(QPen(selected_color or VERIFIED_COLOR, 3))
+        painter.drawRect(box_rect(selected_box, pixmap.width(), pixmap.height()))
+
+    painter.setPen(QPen(DELETED_COLOR, 3))
+    for box in deleted_boxes:
+        painter.drawRect(box_rect(box, pixmap.width(), pixmap.height()))
+
+    painter.end()
+    return pixmap
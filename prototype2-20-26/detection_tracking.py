@@ -0,0 +1,148 @@
+"""Carry detections from one burst frame to the next without inference.
+
+Each box from the previous frame is found again in the next frame by
+normalised template matching inside a window around its old position. The
+propagated boxes are rejected (and the frame re-inferred) when any match is
+weak, when a box jumps too far from where it was (low IoU with the old box),
+or when the scene changed outside the tracked boxes, which means something
+new may have walked in. Besides the overall share of changed pixels, any
+small compact changed patch counts, so a distant animal is not averaged away.
+A keyframe without detections is never propagated: "nothing here" is exactly
+what a new arrival would break.
+"""
+
+import cv2
+import numpy as np
+
+
+def box_iou(first, second) -> float:
+    """Intersection over union of two (x1, y1, x2, y2) boxes."""
+    x1 = max(first[0], second[0])
+    y1 = max(first[1], second[1])
+    x2 = min(first[2], second[2])
+    y2 = min(first[3], second[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (
+        (first[2] - first[0]) * (first[3] - first[1])
+        + (second[2] - second[0]) * (second[3] - second[1])
+        - inter
+    )
+    return inter / union if union > 0 else 0.0
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+
+def changed_outside(prev_gray, gray, boxes, pixel_delta: float = 25.0, window: int = 3) -> tuple[float, float]:
+    """Change outside boxes, after removing the global brightness shift.
+
+    Returns (fraction of outside pixels that changed, largest changed share of
+    any window x window patch of the 64x48 thumbnail).
+    """
+    size = (64, 48)
+    prev_small = cv2.resize(prev_gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+    small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+    diff = np.abs(small - prev_small - float(small.mean() - prev_small.mean()))
+
+    mask = np.ones(diff.shape, dtype=bool)
+    scale_x = size[0] / gray.shape[1]
+    scale_y = size[1] / gray.shape[0]
+    for x1, y1, x2, y2 in boxes:
+        mask[
+            int(y1 * scale_y):int(np.ceil(y2 * scale_y)),
+            int(x1 * scale_x):int(np.ceil(x2 * scale_x)),
+        ] = False
+
+    outside = np.count_nonzero(mask)
+    if outside == 0:
+        return 0.0, 0.0
+
+    changed = ((diff > pixel_delta) & mask).astype(np.float32)
+    # Mean over each patch; a compact blob fills one even when the frame barely changed.
+    local = cv2.blur(changed, (window, window), borderType=cv2.BORDER_CONSTANT)
+    return float(np.count_nonzero(changed)) / outside, float(local.max())
+
+
+def propagate_detections(
+    prev_frame: np.ndarray,
+    prev_detections: list[dict],
+    frame: np.ndarray,
+    scale: float = 1.0,
+    min_score: float = 0.6,
+    min_iou: float = 0.3,
+    search_margin: float = 0.5,
+    max_scene_change: float = 0.02,
+    max_local_change: float = 0.5,
+):
+    """Track prev_detections into frame.
+
+    Both frames must be decoded at the same size; `scale` maps their pixels to
+    full resolution for `bbox_xyxy`. Returns (detections, confidence) where
+    detections is None if propagation is not trusted and the frame should be
+    inferred instead.
+    """
+    if not prev_detections:
+        # An empty keyframe proves nothing about a sibling an animal may have entered.
+        return None, 0.0
+
+    prev_gray = to_gray(prev_frame)
+    gray = to_gray(frame)
+    if prev_gray.shape != gray.shape:
+        return None, 0.0
+
+    img_h, img_w = gray.shape
+    detections = []
+    tracked_boxes = []
+    confidence = 1.0
+
+    for det in prev_detections:
+        x_center, y_center, width, height = det["bbox_xywhn"]
+        x1 = int(round((x_center - width / 2.0) * img_w))
+        y1 = int(round((y_center - height / 2.0) * img_h))
+        x2 = int(round((x_center + width / 2.0) * img_w))
+        y2 = int(round((y_center + height / 2.0) * img_h))
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = min(x2, img_w), min(y2, img_h)
+
+        if x2 - x1 < 8 or y2 - y1 < 8:
+            # Too small to match reliably at this resolution.
+            return None, 0.0
+
+        template = prev_gray[y1:y2, x1:x2]
+        margin_x = int((x2 - x1) * search_margin)
+        margin_y = int((y2 - y1) * search_margin)
+        wx1, wy1 = max(x1 - margin_x, 0), max(y1 - margin_y, 0)
+        wx2, wy2 = min(x2 + margin_x, img_w), min(y2 + margin_y, img_h)
+        window = gray[wy1:wy2, wx1:wx2]
+
+        result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(result)
+
+        new_box = (wx1 + dx, wy1 + dy, wx1 + dx + (x2 - x1), wy1 + dy + (y2 - y1))
+        if score < min_score or box_iou((x1, y1, x2, y2), new_box) < min_iou:
+            return None, float(score)
+
+        confidence = min(confidence, float(score))
+        tracked_boxes.extend([(x1, y1, x2, y2), new_box])
+
+        nx1, ny1, nx2, ny2 = new_box
+        detections.append({
+            "class_id": det["class_id"],
+            "class_name": det["class_name"],
+            # Class confidence is the keyframe model's; the match score only gates tracking.
+            "confidence": det["confidence"],
+            "bbox_xyxy": [nx1 * scale, ny1 * scale, nx2 * scale, ny2 * scale],
+            "bbox_xywhn": [
+                (nx1 + nx2) / 2.0 / img_w,
+                (ny1 + ny2) / 2.0 / img_h,
+                (nx2 - nx1) / img_w,
+                (ny2 - ny1) / img_h,
+            ],
+        })
+
+    scene_change, local_change = changed_outside(prev_gray, gray, tracked_boxes)
+    if scene_change > max_scene_change or local_change > max_local_change:
+        return None, 0.0
+
+    return detections, confidence
@@ -0,0 +1,152 @@
+"""Cheap "likely empty" check run before YOLO inference.
+
+Most triggers are wind or shadows, so the scene barely differs from the frames
+before it. Each camera folder keeps a running background of tiny grayscale
+thumbnails; a new frame is scored by the fraction of thumbnail pixels that
+differ from that background once global brightness is removed. Frames under
+the threshold are "likely empty".
+
+A sequence restarts (no verdict, background reset) when the capture-time gap
+is too long or the overall brightness jumps, e.g. the IR switch at dusk.
+A sampled share of likely-empty frames is inferred anyway and audited: a
+detection on one of them is a false skip. The counters in `stats()` are what
+the threshold is tuned on; frames opened in the viewer are not counted.
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+class EmptyFramePrefilter:
+    def __init__(
+        self,
+        threshold: float = 0.01,
+        pixel_delta: float = 25.0,
+        alpha: float = 0.1,
+        max_gap_s: float = 30 * 60,
+        max_brightness_shift: float = 40.0,
+        audit_rate: float = 0.05,
+        size: tuple[int, int] = (64, 48),
+    ):
+        # Fraction of changed thumbnail pixels below which a frame is likely empty.
+        self.threshold = threshold
+        # Grey-level difference that counts a thumbnail pixel as changed.
+        self.pixel_delta = pixel_delta
+        # Weight of the newest frame in the running background.
+        self.alpha = alpha
+        self.max_gap_s = max_gap_s
+        self.max_brightness_shift = max_brightness_shift
+        # Share of likely-empty frames that are inferred anyway to measure false skips.
+        self.audit_rate = audit_rate
+        self.size = size
+
+        # camera key -> {"background": float32 thumbnail, "time": last capture time}
+        self.cameras = {}
+        # image path -> (score, likely_empty) for the latest verdict.
+        self.verdicts = {}
+        self.counts = {
+            "scored": 0,
+            "new_sequence": 0,
+            "likely_empty": 0,
+            "skipped": 0,
+            "audited": 0,
+            "false_skips": 0,
+        }
+        self.decisions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def camera_key(image_path: str) -> str:
+        """Frames from one camera folder share a background."""
+        return os.path.dirname(os.path.abspath(image_path))
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """Downscaled grayscale copy without the camera's info strips."""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # Trail cameras burn a changing time/temperature bar into the top or bottom.
+        height = frame.shape[0]
+        strip = height // 12
+        frame = frame[strip:height - strip]
+
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def observe(self, image_path: str, thumbnail: np.ndarray, capture_time: float) -> tuple[float | None, bool]:
+        """Score one frame against its camera's background, then update the background.
+
+        Returns (score, likely_empty). score is None when the frame starts a
+        new sequence and there is nothing to compare with.
+        """
+        key = self.camera_key(image_path)
+
+        with self.lock:
+            self.counts["scored"] += 1
+            camera = self.cameras.get(key)
+
+            score = None
+            if camera is not None:
+                background = camera["background"]
+                gap = abs(capture_time - camera["time"])
+                shift = float(thumbnail.mean() - background.mean())
+
+                if gap <= self.max_gap_s and abs(shift) <= self.max_brightness_shift:
+                    # Remove global brightness change (clouds, exposure) before differencing.
+                    diff = np.abs(thumbnail - background - shift)
+                    score = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+
+            if score is None:
+                self.counts["new_sequence"] += 1
+                self.cameras[key] = {"background": thumbnail.copy(), "time": capture_time}
+            else:
+                cv2.accumulateWeighted(thumbnail, camera["background"], self.alpha)
+                camera["time"] = capture_time
+
+            likely_empty = score is not None and score < self.threshold
+            if likely_empty:
+                self.counts["likely_empty"] += 1
+            self.verdicts[os.path.abspath(image_path)] = (score, likely_empty)
+
+        return score, likely_empty
+
+    def verdict(self, image_path: str):
+        """Latest (score, likely_empty) for an image, or None if it was never scored."""
+        with self.lock:
+            return self.verdicts.get(os.path.abspath(image_path))
+
+    def should_skip(self) -> bool:
+        """Decide whether a likely-empty frame skips inference or is kept as an audit sample."""
+        with self.lock:
+            self.decisions += 1
+            # Every 1/audit_rate-th likely-empty frame is inferred anyway.
+            every = round(1 / self.audit_rate) if self.audit_rate > 0 else 0
+            if every and self.decisions % every == 0:
+                return False
+            self.counts["skipped"] += 1
+            return True
+
+    def record_audit(self, image_path: str, detections) -> None:
+        """Count an inferred likely-empty frame; any detection makes it a false skip."""
+        verdict = self.verdict(image_path)
+        if verdict is None or not verdict[1]:
+            return
+
+        with self.lock:
+            self.counts["audited"] += 1
+            if detections:
+                self.counts["false_skips"] += 1
+
+    def stats(self) -> dict:
+        """Counters plus skip and false-skip rates for tuning the threshold."""
+        with self.lock:
+            counts = dict(self.counts)
+
+        counts["skip_rate"] = counts["skipped"] / counts["scored"] if counts["scored"] else 0.0
+        counts["false_skip_rate"] = (
+            counts["false_skips"] / counts["audited"] if counts["audited"] else 0.0
+        )
+        counts["threshold"] = self.threshold
+        return counts
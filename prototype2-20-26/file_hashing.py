@@ -0,0 +1,39 @@
+"""Content fingerprints used to key on-disk caches and dataset indexes."""
+
+from pathlib import Path
+import hashlib
+import os
+
+# Bytes read from each end of a file for the fast digest.
+SAMPLE_BYTES = 64 * 1024
+
+
+def fast_file_digest(path) -> str:
+    """Hash file size plus leading/trailing bytes; cheap enough to run per image."""
+    path = Path(path)
+    size = os.stat(path).st_size
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode("ascii"))
+
+    with path.open("rb") as f:
+        digest.update(f.read(SAMPLE_BYTES))
+
+        # JPEG headers carry EXIF timestamps and the tail carries scan data, so
+        # sampling both ends separates distinct camera frames without a full read.
+        if size > SAMPLE_BYTES * 2:
+            f.seek(-SAMPLE_BYTES, os.SEEK_END)
+        digest.update(f.read(SAMPLE_BYTES))
+
+    return digest.hexdigest()
+
+
+def full_file_digest(path, chunk_size: int = 1024 * 1024) -> str:
+    """Hash the whole file; used where byte-identical content must be proven."""
+    digest = hashlib.blake2b(digest_size=20)
+
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
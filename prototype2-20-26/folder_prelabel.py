@@ -0,0 +1,91 @@
+"""Batch pre-labelling of a whole folder before review.
+
+Runs every image of the folder through `ImageLabeler.predict_many` on a pool
+thread, in capture order, so detections are in the prediction cache by the
+time the reviewer opens them. This is the path where the empty-frame
+prefilter skips likely-empty frames (keeping a sampled share for audit).
+Skipped frames are not cached; the viewer infers them if they are opened.
+"""
+
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class PrelabelSignals(QObject):
+    # generation, images done, images total
+    progress = Signal(int, int, int)
+    # generation, report dict (None when the pass failed or was cancelled)
+    finished = Signal(int, object)
+
+
+class PrelabelTask(QRunnable):
+    def __init__(self, prelabeler, generation: int, paths: list):
+        super().__init__()
+        self.prelabeler = prelabeler
+        self.generation = generation
+        self.paths = paths
+
+    def cancelled(self) -> bool:
+        return self.generation != self.prelabeler.generation
+
+    def run(self):
+        labeler = self.prelabeler.labeler
+        signals = self.prelabeler.signals
+        total = len(self.paths)
+        started = time.perf_counter()
+        before = labeler.prefilter.stats()
+
+        done = 0
+        empty = 0
+        try:
+            for _, detections in labeler.predict_many(self.paths):
+                if self.cancelled():
+                    # Closing the generator waits for its in-flight decodes.
+                    signals.finished.emit(self.generation, None)
+                    return
+                done += 1
+                empty += not detections
+                if done % 64 == 0:
+                    signals.progress.emit(self.generation, done, total)
+        except Exception as e:
+            print(f"Folder pre-label failed: {e}")
+            signals.finished.emit(self.generation, None)
+            return
+
+        after = labeler.prefilter.stats()
+        signals.finished.emit(self.generation, {
+            "images": done,
+            "empty": empty,
+            "skipped": after["skipped"] - before["skipped"],
+            "audited": after["audited"] - before["audited"],
+            "false_skips": after["false_skips"] - before["false_skips"],
+            "seconds": time.perf_counter() - started,
+        })
+
+
+class FolderPrelabeler:
+    """Runs at most one pre-label pass at a time; a new folder cancels the old pass."""
+
+    def __init__(self, labeler, parent=None):
+        self.labeler = labeler
+        self.pool = QThreadPool(parent)
+        self.pool.setMaxThreadCount(1)
+        self.signals = PrelabelSignals(parent)
+        self.generation = 0
+        self.running = False
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self.generation
+
+    def start(self, paths) -> None:
+        self.generation += 1
+        self.running = True
+        self.pool.start(PrelabelTask(self, self.generation, list(paths)))
+
+    def cancel(self) -> None:
+        self.generation += 1
+        self.running = False
+
+    def wait(self) -> None:
+        self.pool.waitForDone()
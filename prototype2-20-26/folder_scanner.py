@@ -0,0 +1,205 @@
+"""Recursive, streaming image discovery for camera card folders.
+
+SD-card dumps are nested as `<camera>/<date>/DCIMxxx`, so the viewer walks the
+whole tree with `os.scandir` and streams paths back in chunks while the walk
+continues. A per-root index of (name, size, mtime) for every directory is
+persisted under `runtime/folder_index/`; on reopen, directories whose mtime
+has not changed reuse their stored listing instead of being re-read.
+"""
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from app_paths import app_base_dir
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif')
+
+
+def is_image_name(name: str) -> bool:
+    # Check for image extension AND ensure it doesn't start with '.'
+    return name.lower().endswith(IMAGE_EXTENSIONS) and not name.startswith('.')
+
+
+class FolderIndex:
+    """Persisted per-directory listings for one scan root."""
+
+    def __init__(self, root, index_dir=None):
+        self.root = str(Path(root))
+        index_dir = Path(index_dir) if index_dir else app_base_dir() / "runtime" / "folder_index"
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        # One file per root, named by a hash of the root path.
+        root_hash = hashlib.blake2b(self.root.encode("utf-8"), digest_size=12).hexdigest()
+        self.path = index_dir / f"{root_hash}.json"
+
+        # dir path -> {"mtime_ns": int, "files": [[name, size, mtime_ns], ...], "subdirs": [name, ...]}
+        self.dirs = {}
+        self.load()
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("root") == self.root:
+            self.dirs = data.get("dirs", {})
+
+    def save(self, visited_dirs: dict):
+        """Persist the listings seen by the last complete walk (drops deleted dirs)."""
+        self.dirs = visited_dirs
+        data = {"root": self.root, "dirs": visited_dirs}
+        # Per-thread temp name: the UI thread and the scan worker may both save.
+        tmp = self.path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def list_directory(directory: str) -> dict:
+    """Read one directory's image files and subdirectories from disk."""
+    files = []
+    subdirs = []
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Hidden folders hold app state (e.g. trash), never camera images.
+                    if not entry.name.startswith('.'):
+                        subdirs.append(entry.name)
+                elif entry.is_file() and is_image_name(entry.name):
+                    stat = entry.stat()
+                    files.append([entry.name, stat.st_size, stat.st_mtime_ns])
+            except OSError:
+                continue
+
+    files.sort(key=lambda row: row[0])
+    subdirs.sort()
+    return {"files": files, "subdirs": subdirs}
+
+
+def scan_folder(root, index: FolderIndex | None = None, first_chunk: int = 50,
+                chunk_size: int = 2000, should_stop=None):
+    """Yield lists of image paths under root, depth first, in stable order.
+
+    The first chunk is small so the viewer can show an image immediately.
+    When `index` is given, unchanged directories are served from it and the
+    index is saved after a complete walk.
+    """
+    root = str(Path(root))
+    known = index.dirs if index is not None else {}
+    visited = {}
+    chunk = []
+    limit = first_chunk
+
+    stack = [root]
+    while stack:
+        if should_stop is not None and should_stop():
+            return
+
+        directory = stack.pop()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+
+        listing = known.get(directory)
+        if listing is None or listing.get("mtime_ns") != mtime_ns:
+            # Only directories whose entries changed since last time are re-read.
+            try:
+                listing = list_directory(directory)
+            except OSError:
+                continue
+            listing["mtime_ns"] = mtime_ns
+
+        visited[directory] = listing
+
+        for name, _, _ in listing["files"]:
+            chunk.append(os.path.join(directory, name))
+            if len(chunk) >= limit:
+                yield chunk
+                chunk = []
+                limit = chunk_size
+
+        # Reverse so the stack pops subdirectories in sorted order.
+        for name in reversed(listing["subdirs"]):
+            stack.append(os.path.join(directory, name))
+
+    if chunk:
+        yield chunk
+
+    if index is not None:
+        index.save(visited)
+
+
+class ScanSignals(QObject):
+    # generation, list of image paths
+    chunkReady = Signal(int, object)
+    # generation, total number of images found
+    finished = Signal(int, int)
+
+
+class ScanTask(QRunnable):
+    def __init__(self, scanner, generation: int, root: str):
+        super().__init__()
+        self.scanner = scanner
+        self.generation = generation
+        self.root = root
+
+    def run(self):
+        total = 0
+        cancelled = lambda: self.generation != self.scanner.generation
+
+        try:
+            index = FolderIndex(self.root)
+            for chunk in scan_folder(self.root, index, should_stop=cancelled):
+                total += len(chunk)
+                self.scanner.signals.chunkReady.emit(self.generation, chunk)
+        except Exception as e:
+            print(f"Folder scan failed for {self.root}: {e}")
+
+        if not cancelled():
+            self.scanner.signals.finished.emit(self.generation, total)
+
+
+class FolderScanner(QObject):
+    """Run scan_folder on a background thread and forward chunks to the UI thread."""
+
+    chunkReady = Signal(list)
+    finished = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.signals = ScanSignals(self)
+        self.signals.chunkReady.connect(self.on_chunk)
+        self.signals.finished.connect(self.on_finished)
+
+        self.generation = 0
+        self.scanning = False
+
+    def start(self, root: str) -> None:
+        """Begin streaming root, cancelling any scan still in progress."""
+        self.cancel()
+        self.scanning = True
+        self.pool.start(ScanTask(self, self.generation, str(root)))
+
+    def cancel(self) -> None:
+        self.generation += 1
+        self.scanning = False
+
+    def on_chunk(self, generation: int, chunk) -> None:
+        if generation == self.generation:
+            self.chunkReady.emit(chunk)
+
+    def on_finished(self, generation: int, total: int) -> None:
+        if generation == self.generation:
+            self.scanning = False
+            self.finished.emit(total)
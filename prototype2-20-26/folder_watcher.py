@@ -0,0 +1,154 @@
+"""Incremental updates for a scanned image folder.
+
+After the initial scan, every directory in the tree is watched with
+QFileSystemWatcher. When one changes, only that directory is re-listed and
+diffed against its stored listing; the resulting added/removed image paths
+are emitted so the viewer can patch its lists instead of rescanning. A rename
+arrives as a remove plus an add. The persisted folder index is kept in step
+so the next open starts from the current state.
+"""
+
+import os
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+from folder_scanner import FolderIndex, list_directory
+
+
+class FolderWatcher(QObject):
+    imagesAdded = Signal(list)
+    imagesRemoved = Signal(list)
+
+    def __init__(self, parent=None, debounce_ms: int = 300):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+        # Copying a burst of files fires many change events; handle them together.
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.apply_changes)
+
+        self.index = None
+        self.dirty = set()
+
+    def start(self, root: str) -> None:
+        """Watch every directory recorded by the last complete scan of root."""
+        self.stop()
+        self.index = FolderIndex(root)
+
+        directories = list(self.index.dirs)
+        if directories:
+            self.watcher.addPaths(directories)
+
+        # Directories that changed while the scan was still running.
+        for directory, listing in self.index.dirs.items():
+            try:
+                if os.stat(directory).st_mtime_ns != listing.get("mtime_ns"):
+                    self.dirty.add(directory)
+            except OSError:
+                self.dirty.add(directory)
+
+        if self.dirty:
+            self.timer.start()
+
+    def stop(self) -> None:
+        self.timer.stop()
+        self.dirty.clear()
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.index = None
+
+    def forget(self, path: str) -> None:
+        """Drop a file the app removed itself so the watcher does not report it again."""
+        if self.index is None:
+            return
+
+        listing = self.index.dirs.get(os.path.dirname(path))
+        if listing is None:
+            return
+
+        name = os.path.basename(path)
+        listing["files"] = [row for row in listing["files"] if row[0] != name]
+
+    def remember(self, path: str) -> None:
+        """Record a file the app put back itself (e.g. an undone delete)."""
+        if self.index is None:
+            return
+
+        listing = self.index.dirs.get(os.path.dirname(path))
+        if listing is None:
+            return
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+
+        name = os.path.basename(path)
+        listing["files"] = [row for row in listing["files"] if row[0] != name]
+        listing["files"].append([name, stat.st_size, stat.st_mtime_ns])
+
+    def on_directory_changed(self, directory: str) -> None:
+        self.dirty.add(directory)
+        self.timer.start()
+
+    def apply_changes(self) -> None:
+        if self.index is None:
+            return
+
+        added = []
+        removed = []
+        pending = sorted(self.dirty)
+        self.dirty.clear()
+
+        while pending:
+            directory = pending.pop()
+            old = self.index.dirs.get(directory, {"files": [], "subdirs": []})
+
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+                new = list_directory(directory)
+                new["mtime_ns"] = mtime_ns
+            except OSError:
+                # The directory itself is gone: drop it and everything below it.
+                removed.extend(self.remove_tree(directory))
+                continue
+
+            old_names = {row[0] for row in old["files"]}
+            new_names = {row[0] for row in new["files"]}
+            removed.extend(os.path.join(directory, name) for name in sorted(old_names - new_names))
+            added.extend(os.path.join(directory, name) for name in sorted(new_names - old_names))
+
+            for name in set(old["subdirs"]) - set(new["subdirs"]):
+                removed.extend(self.remove_tree(os.path.join(directory, name)))
+
+            for name in set(new["subdirs"]) - set(old["subdirs"]):
+                # New folders (e.g. a copied DCIM dump) are listed and watched too.
+                subdir = os.path.join(directory, name)
+                if subdir not in self.index.dirs:
+                    self.watcher.addPath(subdir)
+                    pending.append(subdir)
+
+            self.index.dirs[directory] = new
+
+        self.index.save(self.index.dirs)
+
+        if removed:
+            self.imagesRemoved.emit(removed)
+        if added:
+            self.imagesAdded.emit(added)
+
+    def remove_tree(self, directory: str) -> list:
+        """Forget directory and its subdirectories, returning the images they held."""
+        removed = []
+        prefix = directory + os.sep
+
+        for path in [p for p in self.index.dirs if p == directory or p.startswith(prefix)]:
+            listing = self.index.dirs.pop(path)
+            removed.extend(os.path.join(path, row[0]) for row in listing["files"])
+            self.watcher.removePath(path)
+
+        return removed
@@ -0,0 +1,61 @@
+"""Reduced-resolution image decoding shared by the viewer and the model.
+
+Trail cameras write 12-20 MP JPEGs, but the viewer shows ~1000x700 and the
+model letterboxes to a few hundred pixels. libjpeg can scale during the DCT
+by 1/2, 1/4 or 1/8, so decoding straight to the smallest power-of-two
+reduction that still covers the target skips most of the decode work and
+memory. Pass no target to decode at full resolution (e.g. for zooming).
+"""
+
+from pathlib import Path
+
+import cv2
+
+from image_metadata import read_image_size
+
+
+# DCT scale factor -> OpenCV flag that decodes at that reduction.
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def reduction_factor(width: int, height: int, max_width: int, max_height: int) -> int:
+    """Largest power-of-two reduction whose output still covers the fitted target size."""
+    ratio = min(max_width / width, max_height / height)
+    factor = 1
+    for candidate in (2, 4, 8):
+        if candidate * ratio <= 1.0:
+            factor = candidate
+    return factor
+
+
+def decode_image(path, max_width: int | None = None, max_height: int | None = None):
+    """Decode an image to a BGR array no smaller than needed for the target box.
+
+    Returns (frame, scale) where `scale` multiplies decoded pixel coordinates
+    back to full-resolution ones (1.0 for a full decode). frame is None when
+    the file cannot be read.
+    """
+    path = str(Path(path))
+
+    factor = 1
+    full_size = None
+    if max_width and max_height:
+        full_size = read_image_size(path)
+        if full_size is not None:
+            factor = reduction_factor(full_size[0], full_size[1], max_width, max_height)
+
+    frame = cv2.imread(path, REDUCED_FLAGS[factor])
+    if frame is None:
+        return None, 1.0
+
+    if factor == 1 or full_size is None:
+        return frame, 1.0
+
+    # Compare long sides so EXIF rotation applied by OpenCV does not skew the scale.
+    scale = max(full_size) / max(frame.shape[:2])
+    return frame, scale
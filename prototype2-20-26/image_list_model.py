@@ -0,0 +1,198 @@
+"""Virtualized image list for the viewer's side panel.
+
+A full season's card holds 100k+ images. A QListWidget creates one item
+object per image and search hid rows one by one on the UI thread. Here the
+paths live in a plain list behind a QAbstractListModel, so a QListView only
+asks for rows that are on screen. Search matching runs on a worker thread,
+which returns the matching row numbers; the model swaps them in with one
+reset, so nothing runs per hidden row on the UI thread.
+
+Model rows are the visible rows. `path_row` and `view_row` convert between
+them and indexes into `paths` (the viewer's filtered image list).
+"""
+
+from bisect import bisect_left
+import os
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    Qt,
+    Signal,
+)
+
+
+def name_matches(path: str, text: str) -> bool:
+    return text in os.path.basename(path).lower()
+
+
+class SearchSignals(QObject):
+    # generation, search text, number of paths searched, matching path rows (ascending)
+    finished = Signal(int, str, int, object)
+
+
+class SearchTask(QRunnable):
+    def __init__(self, model, generation: int, text: str, paths: list):
+        super().__init__()
+        self.model = model
+        self.generation = generation
+        self.text = text
+        self.paths = paths
+
+    def run(self):
+        # A newer keystroke already superseded this search.
+        if self.generation != self.model.generation:
+            return
+
+        text = self.text
+        rows = [row for row, path in enumerate(self.paths) if name_matches(path, text)]
+        self.model.signals.finished.emit(self.generation, text, len(self.paths), rows)
+
+
+class ImageListModel(QAbstractListModel):
+    """Rows are image paths, shown by file name and narrowed by an optional search."""
+
+    PathRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = []
+
+        # Ascending indexes into paths shown while a search is active, else None.
+        self.rows = None
+        self.text = ""
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = SearchSignals(self)
+        self.signals.finished.connect(self.on_search_finished)
+
+        self.generation = 0
+        # Text of the search running on the worker, if any.
+        self.searching = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.paths) if self.rows is None else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.rowCount():
+            return None
+
+        path = self.paths[self.path_row(index.row())]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(path)
+        if role in (self.PathRole, Qt.ItemDataRole.ToolTipRole):
+            return path
+        return None
+
+    def path_row(self, view_row: int) -> int:
+        """Index into paths shown at a visible row."""
+        return view_row if self.rows is None else self.rows[view_row]
+
+    def view_row(self, path_row: int) -> int:
+        """Visible row showing paths[path_row], or -1 if the search hides it."""
+        if self.rows is None:
+            return path_row if 0 <= path_row < len(self.paths) else -1
+        position = bisect_left(self.rows, path_row)
+        if position < len(self.rows) and self.rows[position] == path_row:
+            return position
+        return -1
+
+    def set_paths(self, paths) -> None:
+        self.beginResetModel()
+        self.paths = list(paths)
+        if self.text:
+            # Empty until the worker has matched the new list.
+            self.rows = []
+        self.endResetModel()
+
+        if self.text:
+            self.start_search(self.text)
+
+    def append_paths(self, paths) -> None:
+        if not paths:
+            return
+        start = len(self.paths)
+
+        if self.rows is None:
+            self.beginInsertRows(QModelIndex(), start, start + len(paths) - 1)
+            self.paths.extend(paths)
+            self.endInsertRows()
+            return
+
+        # Only the streamed-in batch is matched here.
+        added = [start + offset for offset, path in enumerate(paths) if name_matches(path, self.text)]
+        self.paths.extend(paths)
+        if added:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(added) - 1)
+            self.rows.extend(added)
+            self.endInsertRows()
+
+    def remove_row(self, row: int) -> None:
+        """Remove paths[row]."""
+        if not 0 <= row < len(self.paths):
+            return
+
+        if self.rows is None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.paths[row]
+            self.endRemoveRows()
+        else:
+            view_row = self.view_row(row)
+            position = bisect_left(self.rows, row)
+            if view_row >= 0:
+                self.beginRemoveRows(QModelIndex(), view_row, view_row)
+                del self.rows[position]
+            del self.paths[row]
+            # Later paths moved up by one.
+            self.rows[position:] = [shown - 1 for shown in self.rows[position:]]
+            if view_row >= 0:
+                self.endRemoveRows()
+
+        if self.searching is not None:
+            # The running search numbered rows before this removal.
+            self.start_search(self.searching)
+
+    def set_search(self, text: str) -> None:
+        """Start filtering by text; an empty string shows every row."""
+        text = text.lower()
+        if text:
+            self.start_search(text)
+            return
+
+        self.generation += 1
+        self.pool.clear()
+        self.searching = None
+        self.text = ""
+        if self.rows is not None:
+            self.beginResetModel()
+            self.rows = None
+            self.endResetModel()
+
+    def start_search(self, text: str) -> None:
+        self.generation += 1
+        self.pool.clear()
+        self.searching = text
+        self.pool.start(SearchTask(self, self.generation, text, list(self.paths)))
+
+    def on_search_finished(self, generation: int, text: str, searched: int, rows) -> None:
+        if generation != self.generation:
+            return
+
+        # Paths streamed in after the worker took its copy.
+        rows.extend(
+            searched + offset
+            for offset, path in enumerate(self.paths[searched:])
+            if name_matches(path, text)
+        )
+
+        self.beginResetModel()
+        self.searching = None
+        self.text = text
+        self.rows = rows
+        self.endResetModel()
@@ -0,0 +1,148 @@
+"""Header-only image metadata with a persistent lookup index.
+
+De-normalising YOLO boxes only needs an image's width and height, which the
+JPEG/PNG header already carries. Sizes are memoised in SQLite beside the
+verified dataset, keyed by path plus file size and mtime so edited files are
+re-read automatically.
+"""
+
+from datetime import datetime
+from pathlib import Path
+import os
+import sqlite3
+import threading
+
+from PIL import Image
+
+
+# EXIF orientations that rotate the image by 90 degrees (width/height swap).
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+# EXIF tags for capture time: DateTime in IFD0, DateTimeOriginal in the Exif IFD.
+DATETIME = 0x0132
+EXIF_IFD = 0x8769
+DATETIME_ORIGINAL = 0x9003
+
+
+def read_image_size(path) -> tuple[int, int] | None:
+    """Return (width, height) as displayed, reading only the file header.
+
+    EXIF rotation is applied the same way OpenCV and Ultralytics apply it, so
+    the size matches the frames that labels were normalised against.
+    """
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            orientation = image.getexif().get(0x0112)
+    except Exception:
+        return None
+
+    if orientation in ROTATED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def read_capture_time(path) -> float:
+    """Capture time as a POSIX timestamp: EXIF DateTimeOriginal, else file mtime.
+
+    Trail cameras stamp DateTimeOriginal in local time; only the ordering and
+    gaps between frames of one camera matter, so no timezone is applied.
+    """
+    try:
+        with Image.open(path) as image:
+            exif = image.getexif()
+            stamp = exif.get_ifd(EXIF_IFD).get(DATETIME_ORIGINAL) or exif.get(DATETIME)
+        if stamp:
+            return datetime.strptime(str(stamp).strip(), "%Y:%m:%d %H:%M:%S").timestamp()
+    except Exception:
+        pass
+
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+class ImageSizeIndex:
+    def __init__(self, db_path=None):
+        base_dir = Path.cwd()
+        self.db_path = Path(db_path) if db_path else base_dir / "verified_images" / "image_sizes.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # path -> (file size, mtime_ns, width, height); mirrors the table in memory.
+        self.memory = {}
+
+        # Looked up from prefetch workers as well as the UI thread.
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_sizes ("
+            " path TEXT PRIMARY KEY,"
+            " file_size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " width INTEGER NOT NULL,"
+            " height INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+
+    def size(self, path) -> tuple[int, int] | None:
+        """Return (width, height) for one image, or None if it cannot be read."""
+        return self.sizes([path]).get(str(Path(path)))
+
+    def sizes(self, paths) -> dict:
+        """Return {path: (width, height)} for many images with one commit for new rows."""
+        found = {}
+        new_rows = []
+
+        for path in paths:
+            path = str(Path(path))
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            cached = self.lookup(path)
+            if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                found[path] = (cached[2], cached[3])
+                continue
+
+            size = read_image_size(path)
+            if size is None:
+                continue
+
+            found[path] = size
+            new_rows.append((path, stat.st_size, stat.st_mtime_ns, size[0], size[1]))
+
+        if new_rows:
+            with self.lock:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO image_sizes (path, file_size, mtime_ns, width, height)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    new_rows,
+                )
+                self.conn.commit()
+                for path, file_size, mtime_ns, width, height in new_rows:
+                    self.memory[path] = (file_size, mtime_ns, width, height)
+
+        return found
+
+    def lookup(self, path: str):
+        """Stored (file size, mtime_ns, width, height) for a path, or None."""
+        with self.lock:
+            row = self.memory.get(path)
+            if row is not None:
+                return row
+
+            row = self.conn.execute(
+                "SELECT file_size, mtime_ns, width, height FROM image_sizes WHERE path = ?",
+                (path,),
+            ).fetchone()
+            if row is not None:
+                self.memory[path] = row
+            return row
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
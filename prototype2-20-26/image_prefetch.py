@@ -0,0 +1,121 @@
+"""Background look-ahead loading for the image viewer.
+
+While one image is on screen, neighbouring entries of the filtered list are
+decoded, run through the model and scaled on a `QThreadPool`. Navigation then
+picks the finished payload up instead of blocking the Qt thread.
+"""
+
+import copy
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class PrefetchSignals(QObject):
+    # generation, image path, payload (None when loading failed)
+    finished = Signal(int, str, object)
+
+
+class PrefetchTask(QRunnable):
+    """Load one image payload in a pool thread unless its generation was cancelled."""
+
+    def __init__(self, prefetcher, generation: int, path: str):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.generation = generation
+        self.path = path
+
+    def run(self):
+        # Filter/folder changes bump the generation; skip work nobody will read.
+        if self.generation != self.prefetcher.generation:
+            return
+
+        try:
+            payload = self.prefetcher.load_fn(self.path)
+        except Exception as e:
+            print(f"Prefetch failed for {self.path}: {e}")
+            payload = None
+
+        self.prefetcher.signals.finished.emit(self.generation, self.path, payload)
+
+
+class ImagePrefetcher(QObject):
+    """Keep payloads for the images around the current index ready in memory."""
+
+    def __init__(self, load_fn, depth: int = 3, max_threads: int = 2, parent=None):
+        super().__init__(parent)
+        # `load_fn(path)` runs off the UI thread and must not touch widgets.
+        self.load_fn = load_fn
+        self.depth = depth
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+
+        self.signals = PrefetchSignals(self)
+        self.signals.finished.connect(self.on_task_finished)
+
+        self.generation = 0
+        self.ready = {}
+        self.pending = set()
+        self.window = set()
+        # In-flight loads started before their image's state changed.
+        self.stale = set()
+
+    def cancel(self) -> None:
+        """Drop queued work and stored payloads, e.g. after a filter or folder change."""
+        self.generation += 1
+        self.pool.clear()
+        self.ready.clear()
+        self.pending.clear()
+        self.window.clear()
+        self.stale.clear()
+
+    def discard(self, path: str) -> None:
+        """Forget one stored payload whose verified state or labels just changed."""
+        self.ready.pop(path, None)
+        if path in self.pending:
+            self.stale.add(path)
+
+    def take(self, path: str):
+        """Return a copy of the prefetched payload for path, or None on a miss."""
+        payload = self.ready.get(path)
+        if payload is None:
+            return None
+        # The viewer edits detection dicts in place, so hand out private copies.
+        return {**payload, "detections": copy.deepcopy(payload["detections"])}
+
+    def schedule(self, paths: list[str], index: int) -> None:
+        """Queue the next and previous `depth` images around index, nearest first."""
+        if not paths or self.depth <= 0:
+            return
+
+        wanted = []
+        for offset in range(1, self.depth + 1):
+            for step in (offset, -offset):
+                path = paths[(index + step) % len(paths)]
+                if path not in wanted:
+                    wanted.append(path)
+
+        # Keep the current image too so detection selection can reuse it.
+        self.window = set(wanted) | {paths[index]}
+        for path in list(self.ready):
+            if path not in self.window:
+                del self.ready[path]
+
+        for path in wanted:
+            if path in self.ready or path in self.pending:
+                continue
+            self.pending.add(path)
+            self.pool.start(PrefetchTask(self, self.generation, path))
+
+    def on_task_finished(self, generation: int, path: str, payload) -> None:
+        # Runs on the UI thread via the queued signal connection.
+        if generation != self.generation:
+            return
+
+        self.pending.discard(path)
+        if path in self.stale:
+            # Loaded with the old state; the next schedule() reloads it.
+            self.stale.discard(path)
+            return
+        if payload is not None and path in self.window:
+            self.ready[path] = payload
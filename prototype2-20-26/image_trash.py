@@ -0,0 +1,171 @@
+"""App-managed trash for deleted camera images.
+
+Deleting junk frames should never block the viewer on a slow USB reader, so
+files are moved into `.trailcam_trash/` at the root of the opened folder
+(same volume, so a move is a rename) by a single background worker. Each
+delete is one batch with a `batch.json` of original -> trashed paths; recent
+batches can be undone, and a purge job removes the trash for good. The
+folder scanner skips dot-directories, so trashed files never show up as
+images.
+"""
+
+from pathlib import Path
+import json
+import os
+import shutil
+import time
+import uuid
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+TRASH_DIR_NAME = ".trailcam_trash"
+
+
+class TrashSignals(QObject):
+    # batch id, moved original paths, paths that could not be moved
+    moved = Signal(str, list, list)
+    # batch id, restored original paths
+    restored = Signal(str, list)
+    # files removed, bytes freed
+    purged = Signal(int, int)
+
+
+class MoveTask(QRunnable):
+    def __init__(self, trash, batch_id: str, paths: list):
+        super().__init__()
+        self.trash = trash
+        self.batch_id = batch_id
+        self.paths = paths
+
+    def run(self):
+        batch_dir = self.trash.trash_dir / self.batch_id
+        items = []
+        failed = []
+
+        for index, path in enumerate(self.paths):
+            # Prefix with the position so equal names from different folders do not collide.
+            target = batch_dir / f"{index:06d}_{os.path.basename(path)}"
+            try:
+                batch_dir.mkdir(parents=True, exist_ok=True)
+                shutil.move(path, target)
+                items.append([path, str(target)])
+            except OSError as e:
+                print(f"Could not move {path} to trash: {e}")
+                failed.append(path)
+
+        if items:
+            try:
+                data = {"created": time.time(), "items": items}
+                (batch_dir / "batch.json").write_text(json.dumps(data), encoding="utf-8")
+            except OSError as e:
+                print(f"Could not write trash batch {self.batch_id}: {e}")
+
+        self.trash.signals.moved.emit(self.batch_id, [path for path, _ in items], failed)
+
+
+class RestoreTask(QRunnable):
+    def __init__(self, trash, batch_id: str):
+        super().__init__()
+        self.trash = trash
+        self.batch_id = batch_id
+
+    def run(self):
+        batch_dir = self.trash.trash_dir / self.batch_id
+        restored = []
+
+        try:
+            items = json.loads((batch_dir / "batch.json").read_text(encoding="utf-8"))["items"]
+        except (OSError, ValueError, KeyError):
+            items = []
+
+        for original, trashed in items:
+            if os.path.exists(original):
+                # Something new took the name meanwhile; leave the trashed copy alone.
+                continue
+            try:
+                Path(original).parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(trashed, original)
+                restored.append(original)
+            except OSError as e:
+                print(f"Could not restore {original}: {e}")
+
+        if len(restored) == len(items):
+            shutil.rmtree(batch_dir, ignore_errors=True)
+
+        self.trash.signals.restored.emit(self.batch_id, restored)
+
+
+class PurgeTask(QRunnable):
+    def __init__(self, trash):
+        super().__init__()
+        self.trash = trash
+
+    def run(self):
+        removed = 0
+        freed = 0
+
+        if self.trash.trash_dir.exists():
+            for root, _, files in os.walk(self.trash.trash_dir):
+                for name in files:
+                    if name == "batch.json":
+                        continue
+                    try:
+                        freed += os.path.getsize(os.path.join(root, name))
+                        removed += 1
+                    except OSError:
+                        pass
+            shutil.rmtree(self.trash.trash_dir, ignore_errors=True)
+
+        self.trash.signals.purged.emit(removed, freed)
+
+
+class ImageTrash(QObject):
+    """Queue trash moves, undo and purge on one background thread, in order."""
+
+    def __init__(self, root: str, undo_seconds: int = 60, parent=None):
+        super().__init__(parent)
+        self.trash_dir = Path(root) / TRASH_DIR_NAME
+        self.undo_seconds = undo_seconds
+
+        # One thread keeps move -> undo -> purge in submission order.
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.signals = TrashSignals(self)
+
+        # (batch id, submitted at), newest last.
+        self.undo_stack = []
+
+    def trash(self, paths) -> str:
+        """Queue paths to be moved into the trash; returns the batch id."""
+        batch_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.undo_stack.append((batch_id, time.monotonic()))
+        self.pool.start(MoveTask(self, batch_id, list(paths)))
+        return batch_id
+
+    def can_undo(self) -> bool:
+        self.expire_undo()
+        return bool(self.undo_stack)
+
+    def undo(self) -> str | None:
+        """Queue a restore of the most recent batch still inside the undo window."""
+        if not self.can_undo():
+            return None
+
+        batch_id, _ = self.undo_stack.pop()
+        self.pool.start(RestoreTask(self, batch_id))
+        return batch_id
+
+    def purge(self) -> None:
+        """Queue permanent removal of everything in the trash."""
+        self.undo_stack.clear()
+        self.pool.start(PurgeTask(self))
+
+    def expire_undo(self) -> None:
+        cutoff = time.monotonic() - self.undo_seconds
+        self.undo_stack = [(batch_id, at) for batch_id, at in self.undo_stack if at >= cutoff]
+
+    def wait(self) -> None:
+        """Block until queued file operations finish (used on shutdown)."""
+        self.pool.waitForDone()
@@ -1,7 +1,4 @@
-import os
 from pathlib import Path
-from PIL import Image
-import cv2
 from PySide6.QtWidgets import (
     QWidget,
     QGridLayout,
@@ -11,15 +8,27 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QListWidget,
     QListWidgetItem,
+    QListView,
     QAbstractItemView,
     QCheckBox,
     QComboBox,
 )
 from PySide6.QtWidgets import QHBoxLayout
-from PySide6.QtGui import QPixmap, QShortcut,QGuiApplication
-from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QShortcut,QGuiApplication, QKeySequence
+from PySide6.QtCore import Qt, QTimer, QObject, QItemSelectionModel, Signal
 import qtawesome as qta
+from folder_prelabel import FolderPrelabeler
+from folder_scanner import FolderScanner
+from folder_watcher import FolderWatcher
+from image_list_model import ImageListModel
+from image_prefetch import ImagePrefetcher
+from image_trash import ImageTrash
+from detection_overlay import paint_detections, paint_highlights
+from image_decode import decode_image
+from image_metadata import ImageSizeIndex
 from model_prediction import ImageLabeler
+from qt_image import FrameScaler, frame_to_pixmap
+from render_cache import RenderCache
 from nav_bar import NavBar
 from verified_images_manager import TrainingManager
 from label_editor import LabelEditor
@@ -27,6 +36,18 @@ from label_store import LabelStore
 from ui_dialogs import confirm_action, show_info, show_no_images_popup
 from window_utils import pick_directory, center_on_primary_screen
 
+# Selection outline colours (verified images already draw their boxes in green).
+SELECTED_VERIFIED_COLOR = QColor(255, 0, 0)
+SELECTED_COLOR = QColor(0, 255, 0)
+
+
+class DatasetWriteSignals(QObject):
+    # Emitted from dataset writer threads; Qt queues them onto the UI thread.
+    pendingChanged = Signal(int)
+    writeFailed = Signal(str, str)
+    # dataset name, existing entry whose image and label were kept
+    entryReused = Signal(str, str)
+
 class ImageLoader(QMainWindow):
     def __init__(self, drive):
         super().__init__()
@@ -43,12 +64,16 @@ class ImageLoader(QMainWindow):
         self.labels = []
         self.drive = drive
         self.detections = []
+        # Decoded frames, drawn overlays and scaled pixmaps share one memory budget.
+        self.render_cache_budget_mb = 768
+        self.render_cache = RenderCache(self.render_cache_budget_mb * 1024 * 1024)
+        # UI-thread resizes reuse one display-sized buffer between renders.
+        self.display_scaler = FrameScaler(1000, 700)
         self.detection_combos = []
         self.deletion_bounding_box_cords = []
         self.label_store = LabelStore()
 
-        # Load dataset BEFORE UI filtering
-        self.get_imgs(self.drive, new_dir=True)
+        # The image tree is scanned in the background once the window is up.
         self.load_labels()
         self.current_index = 0
         self.filter_mode = "all"
@@ -58,7 +83,35 @@ class ImageLoader(QMainWindow):
         # Model / backend logic
         # -----------------------------
         self.labeler = ImageLabeler()
-        self.training_manager = TrainingManager(self.drive)
+        self.dataset_write_signals = DatasetWriteSignals(self)
+        self.make_training_manager(self.drive)
+        # Header-only image sizes, remembered across sessions, for de-normalising labels.
+        self.image_sizes = ImageSizeIndex()
+
+        # Neighbouring images are decoded, inferred and scaled in the background.
+        self.prefetch_depth = 3
+        self.prefetcher = ImagePrefetcher(
+            self.load_image_payload,
+            depth=self.prefetch_depth,
+            parent=self,
+        )
+
+        # Whole-folder batch inference on request; skips likely-empty frames.
+        self.prelabeler = FolderPrelabeler(self.labeler, parent=self)
+        self.prelabeler.signals.progress.connect(self.on_prelabel_progress)
+        self.prelabeler.signals.finished.connect(self.on_prelabel_finished)
+
+        # Recursive scan of the camera folder, streamed into the list in chunks.
+        self.folder_scanner = FolderScanner(self)
+        self.folder_scanner.chunkReady.connect(self.on_scan_chunk)
+        self.folder_scanner.finished.connect(self.on_scan_finished)
+        # Files added, removed or renamed afterwards are applied as deltas.
+        self.folder_watcher = FolderWatcher(self)
+        self.folder_watcher.imagesAdded.connect(self.add_images)
+        self.folder_watcher.imagesRemoved.connect(self.remove_images)
+
+        # Deleted images are moved to a trash folder in the background.
+        self.make_trash(self.drive)
 
         # -----------------------------
         # Window setup
@@ -109,11 +162,23 @@ class ImageLoader(QMainWindow):
 
         self.verification_status = QLabel()
 
+        # Dataset copies still waiting on the background writer.
+        self.pending_writes_label = QLabel()
+        self.dataset_write_signals.pendingChanged.connect(self.on_pending_writes_changed)
+        self.dataset_write_signals.writeFailed.connect(self.on_dataset_write_failed)
+        self.dataset_write_signals.entryReused.connect(self.on_dataset_entry_reused)
+
         self.unverify_image_btn = QPushButton()
         self.unverify_image_btn.setIcon(qta.icon('fa6s.circle-xmark'))
         self.unverify_image_btn.setToolTip("Unverify Image")
         self.unverify_image_btn.clicked.connect(self.unverify_image)
 
+        self.prelabel_button = QPushButton()
+        self.prelabel_button.setIcon(qta.icon('fa6s.wand-magic-sparkles'))
+        self.prelabel_button.setToolTip("Pre-label Folder (runs the model on every image ahead of review)")
+        self.prelabel_button.clicked.connect(self.prelabel_folder)
+        self.prelabel_status = QLabel()
+
         self.confirm_toggle = QCheckBox("Enable prompts and popups")
         self.confirm_toggle.setChecked(True)
 
@@ -135,7 +200,15 @@ class ImageLoader(QMainWindow):
         self.image_label = QLabel("No images found")
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.image_list = QListWidget()
+        # Virtualized list: only rows on screen are materialised.
+        self.image_list_model = ImageListModel(self)
+
+        self.image_list = QListView()
+        self.image_list.setModel(self.image_list_model)
+        self.image_list.setUniformItemSizes(True)
+        self.image_list.setEditTriggers(QAbstractItemView.NoEditTriggers) # type: ignore
+        # Shift/Ctrl-click to pick several images for one delete.
+        self.image_list.setSelectionMode(QAbstractItemView.ExtendedSelection) # type: ignore
 
         self.detection_label = QLabel("Detections:") 
 
@@ -145,14 +218,32 @@ class ImageLoader(QMainWindow):
 
         self.delete_button = QPushButton()
         self.delete_button.setIcon(qta.icon('fa6s.trash'))
-        self.delete_button.setToolTip("Delete Image")
+        self.delete_button.setToolTip("Delete Selected Images")
         self.delete_button.clicked.connect(self.delete_image)
 
+        self.undo_delete_button = QPushButton()
+        self.undo_delete_button.setIcon(qta.icon('fa6s.trash-can-arrow-up'))
+        self.undo_delete_button.setToolTip("Undo Last Delete")
+        self.undo_delete_button.setEnabled(False)
+        self.undo_delete_button.clicked.connect(self.undo_delete)
+
+        self.purge_trash_button = QPushButton()
+        self.purge_trash_button.setIcon(qta.icon('fa6s.dumpster'))
+        self.purge_trash_button.setToolTip("Empty Trash")
+        self.purge_trash_button.clicked.connect(self.purge_trash)
+
+        delete_controls = QHBoxLayout()
+        delete_controls.addWidget(self.delete_button)
+        delete_controls.addWidget(self.undo_delete_button)
+        delete_controls.addWidget(self.purge_trash_button)
+
         # Navigation
         self.previousImage = QPushButton('<- Previous')
+        self.previousImage.setToolTip("Previous image (Ctrl+Left: previous burst)")
         self.previousImage.clicked.connect(self.previous_image)
 
         self.nextImage = QPushButton('Next ->')
+        self.nextImage.setToolTip("Next image (Ctrl+Right: next burst)")
         self.nextImage.clicked.connect(self.next_image)
 
         # Keyboard shortcuts
@@ -160,6 +251,10 @@ class ImageLoader(QMainWindow):
         QShortcut(Qt.Key_Left, self, self.previous_image) # type: ignore
         QShortcut(Qt.Key_Return, self, self.mark_verified) # type: ignore
         QShortcut(Qt.Key_Enter, self, self.mark_verified) # type: ignore
+        QShortcut(Qt.Key_Delete, self, self.delete_image) # type: ignore
+        QShortcut(QKeySequence("Ctrl+Right"), self, self.next_burst)
+        QShortcut(QKeySequence("Ctrl+Left"), self, self.previous_burst)
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo_delete)
 
         # -----------------------------
         # Layout placement
@@ -176,6 +271,7 @@ class ImageLoader(QMainWindow):
         # -----------------------------
         layout.addWidget(self.filter_dropdown, 1, 0, 1, 2)
         layout.addWidget(self.confirm_toggle, 1, 2)
+        layout.addWidget(self.prelabel_button, 1, 4)
         layout.addWidget(self.search_box, 1, 5)
         # -----------------------------
         # Main Content Area
@@ -193,7 +289,7 @@ class ImageLoader(QMainWindow):
         # -----------------------------
         # Verification Controls (moved down one row)
         # -----------------------------
-        layout.addWidget(self.delete_button, 4, 1)
+        layout.addLayout(delete_controls, 4, 1)
         layout.addWidget(self.verification_status, 4, 2)
         layout.addWidget(self.verify_image, 4, 3)
         layout.addWidget(self.unverify_image_btn, 4, 4)
@@ -201,25 +297,22 @@ class ImageLoader(QMainWindow):
         # Navigation Row
         # -----------------------------
         layout.addWidget(self.previousImage, 5, 0)
+        layout.addWidget(self.pending_writes_label, 5, 2)
+        layout.addWidget(self.prelabel_status, 5, 3)
         layout.addWidget(self.nextImage, 5, 4)
 
         # Image list button assignments
-        self.image_list.itemClicked.connect(self.on_list_item_clicked)
+        self.image_list.clicked.connect(self.on_list_item_clicked)
         self.search_box.textChanged.connect(self.filter_list)
+        # A finished search resets the list; keep the current image highlighted.
+        self.image_list_model.modelReset.connect(lambda: self.select_list_row(self.current_index))
 
         # Final dataset initialization after widgets exist
-        self.apply_filter("all")
-
-        self.load_image_list()
-
-        if self.filtered_images:
-            self.image_list.setCurrentRow(self.current_index)
-            self.load_current_image_data()
-            self.update_display()
-
         self.center_window()
         self.show()
 
+        self.start_folder_scan(self.drive)
+
     # Center the window when they open it
     def center_window(self):
         center_on_primary_screen(self)
@@ -228,60 +321,180 @@ class ImageLoader(QMainWindow):
     # Image handle functions
     # -----------------------------
     def load_image_list(self):
-        self.image_list.clear()
-
-        for image in self.filtered_images:
-            item = QListWidgetItem(Path(image).name)
-            item.setData(Qt.UserRole, image) # type: ignore
-            self.image_list.addItem(item)
+        self.image_list_model.set_paths(self.filtered_images)
 
     def filter_list(self, text):
-        text = text.lower()
-
-        for row in range(self.image_list.count()):
-            item = self.image_list.item(row)
-
-            filename = item.text().lower()
-            #full_path = item.data(Qt.UserRole).lower()
-
-            match = text in filename
-            item.setHidden(not match)
+        # Matching runs on a worker thread; the model swaps in the matching rows when it finishes.
+        self.image_list_model.set_search(text)
+
+    def select_list_row(self, row):
+        """Highlight filtered_images[row] in the list if the search is not hiding it."""
+        index = self.image_list_model.index(self.image_list_model.view_row(row))
+        if not index.isValid() or index == self.image_list.currentIndex():
+            # A click already made it current; re-selecting would undo Ctrl/Shift multi-select.
+            return
+        # Explicit flags: the view's own setCurrentIndex applies held keyboard modifiers.
+        self.image_list.selectionModel().setCurrentIndex(
+            index, QItemSelectionModel.SelectionFlag.ClearAndSelect
+        )
+        self.image_list.scrollTo(index)
+
+    def selected_image_paths(self):
+        """Images selected in the list, or the current image when none are."""
+        rows = sorted({
+            self.image_list_model.path_row(index.row())
+            for index in self.image_list.selectionModel().selectedIndexes()
+        })
+        if not rows and self.filtered_images:
+            rows = [self.current_index]
+        return [self.filtered_images[row] for row in rows if row < len(self.filtered_images)]
 
     def delete_image(self):
         if not self.images:
           return
 
+        paths = self.selected_image_paths()
+        if not paths:
+            return
+
+        message = "Delete this image?" if len(paths) == 1 else f"Delete {len(paths)} images?"
         if not confirm_action(
             self,
             "Confirm Image Deletion?",
-            "Delete this image? (This could take a minute)",
+            message,
             self.confirm_toggle.isChecked()
         ):
             return
 
-        file_path = self.filtered_images[self.current_index]
+        # Update the UI right away; the files move to the trash in the background.
+        for path in paths:
+            self.folder_watcher.forget(path)
+        self.remove_images(paths)
+        self.trash.trash(paths)
+        self.update_trash_buttons()
 
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        if not self.images:
+            self.current_index = -1
+            show_no_images_popup(self)
 
-        self.get_imgs(self.drive, True)
-        self.image_list.takeItem(self.current_index)
+    def make_training_manager(self, drive):
+        self.training_manager = TrainingManager(drive)
+        writer = self.training_manager.writer
+        writer.on_change = self.dataset_write_signals.pendingChanged.emit
+        writer.on_error = self.dataset_write_signals.writeFailed.emit
+        # The duplicate check hashes the source, so it runs on the writer and reports back.
+        self.training_manager.on_reused = self.dataset_write_signals.entryReused.emit
+
+    def on_pending_writes_changed(self, pending):
+        self.pending_writes_label.setText(f"Saving {pending}..." if pending else "")
+
+    def on_dataset_write_failed(self, name, error):
+        # The manager already rolled back the image's verified state; drop renders
+        # that may still show the old state and redraw the current image.
+        self.prefetcher.cancel()
+        if self.filtered_images:
+            self.forget_rendered_image(self.filtered_images[self.current_index])
+            self.load_current_image_data()
+            self.update_display()
+        show_info(self, "Save Failed", f"Could not save {name} to the dataset:\n{error}")
+
+    def on_dataset_entry_reused(self, name, entry):
+        # The verified image's labels are now the existing entry's; redraw if it is on screen.
+        source = self.training_manager.source_for_name(name)
+        if source is not None:
+            self.forget_rendered_image(source)
+            if self.filtered_images and self.filtered_images[self.current_index] == source:
+                self.load_current_image_data()
+                self.update_display()
+        show_info(
+            self,
+            "Already in Dataset",
+            f"{name} is byte-identical to:\n{entry}\n\nThat image and its labels were kept."
+        )
+
+    def prelabel_folder(self):
+        """Run the model over every image of the folder in the background."""
+        if not self.images or self.prelabeler.running:
+            return
+        # Scan order is capture order per camera folder, which the prefilter relies on.
+        self.prelabeler.start(self.images)
+        self.prelabel_button.setEnabled(False)
+        self.prelabel_status.setText("Pre-labelling...")
+
+    def on_prelabel_progress(self, generation, done, total):
+        if self.prelabeler.is_current(generation):
+            self.prelabel_status.setText(f"Pre-labelled {done}/{total}")
 
+    def on_prelabel_finished(self, generation, report):
+        if not self.prelabeler.is_current(generation):
+            return
+        self.prelabeler.running = False
+        self.prelabel_button.setEnabled(True)
+        self.prelabel_status.setText("")
+        if report is None:
+            return
         show_info(
             self,
-            "Image Deleted",
-            f"Deleted from:\n{file_path}\n"
+            "Pre-label Finished",
+            f"Pre-labelled {report['images']} images in {report['seconds']:.0f} s.\n"
+            f"{report['skipped']} likely-empty frames skipped without inference, "
+            f"{report['audited']} audited ({report['false_skips']} had detections)."
         )
 
-        if self.images:
-            self.current_index = min(self.current_index, len(self.images) - 1)
-            self.update_display()
-        else:
-            self.current_index = -1
-            show_no_images_popup(self)
+    def make_trash(self, drive):
+        self.trash = ImageTrash(drive, parent=self)
+        self.trash.signals.moved.connect(self.on_trash_moved)
+        self.trash.signals.restored.connect(self.on_trash_restored)
+        self.trash.signals.purged.connect(self.on_trash_purged)
+
+    def undo_delete(self):
+        self.trash.undo()
+        self.update_trash_buttons()
+
+    def purge_trash(self):
+        if not confirm_action(
+            self,
+            "Empty Trash?",
+            "Permanently delete every image in the trash? This cannot be undone.",
+            self.confirm_toggle.isChecked()
+        ):
+            return
+
+        self.trash.purge()
+        self.update_trash_buttons()
+
+    def update_trash_buttons(self):
+        self.undo_delete_button.setEnabled(self.trash.can_undo())
+        if self.trash.can_undo():
+            # Re-check once the newest batch leaves the undo window.
+            QTimer.singleShot(self.trash.undo_seconds * 1000 + 100, self.update_trash_buttons)
+
+    def on_trash_moved(self, batch_id, moved, failed):
+        if failed:
+            # Put back the images that could not be moved (e.g. read-only card).
+            for path in failed:
+                self.folder_watcher.remember(path)
+            self.add_images(failed)
+            show_info(
+                self,
+                "Delete Failed",
+                f"{len(failed)} image(s) could not be moved to the trash."
+            )
 
-    def on_list_item_clicked(self, item):
-        self.current_index = self.image_list.row(item)
+    def on_trash_restored(self, batch_id, paths):
+        for path in paths:
+            self.folder_watcher.remember(path)
+        self.add_images(paths)
+
+    def on_trash_purged(self, count, freed_bytes):
+        show_info(
+            self,
+            "Trash Emptied",
+            f"Permanently deleted {count} image(s), freeing {freed_bytes / (1024 * 1024):.1f} MB."
+        )
+
+    def on_list_item_clicked(self, index):
+        self.current_index = self.image_list_model.path_row(index.row())
         self.load_current_image_data()
         self.update_display()
         
@@ -301,6 +514,41 @@ class ImageLoader(QMainWindow):
         self.load_current_image_data()
         self.update_display()
 
+    def burst_start(self, index):
+        """Index of the first frame of the burst containing filtered_images[index]."""
+        bursts = self.labeler.bursts
+        while index > 0 and bursts.same_burst(self.filtered_images[index - 1], self.filtered_images[index]):
+            index -= 1
+        return index
+
+    def next_burst(self):
+        """Jump to the first frame of the next burst."""
+        if not self.filtered_images:
+            return
+
+        bursts = self.labeler.bursts
+        index = self.current_index
+        last = len(self.filtered_images) - 1
+        while index < last and bursts.same_burst(self.filtered_images[index], self.filtered_images[index + 1]):
+            index += 1
+
+        self.current_index = (index + 1) % len(self.filtered_images)
+        self.load_current_image_data()
+        self.update_display()
+
+    def previous_burst(self):
+        """Jump to the start of this burst, or of the previous one when already there."""
+        if not self.filtered_images:
+            return
+
+        start = self.burst_start(self.current_index)
+        if start == self.current_index:
+            start = self.burst_start((self.current_index - 1) % len(self.filtered_images))
+
+        self.current_index = start
+        self.load_current_image_data()
+        self.update_display()
+
     
     def populate_detections(self, detections, class_list):
         self.detection_editor.clear()
@@ -343,8 +591,8 @@ class ImageLoader(QMainWindow):
     
     def delete_detection_object(self, det):
 
-        # Extract coordinates BEFORE removing
-        x1, y1, x2, y2 = map(int, det["bbox_xyxy"])
+        # Extract normalized coordinates BEFORE removing
+        yoloBoxes = list(det["bbox_xywhn"])
 
         # Remove detection
         self.detections.remove(det)
@@ -354,29 +602,33 @@ class ImageLoader(QMainWindow):
             self.detections,
             self.labels
         )
-        yoloBoxes = [x1,y1,x2,y2]
         self.deletion_bounding_box_cords.append(yoloBoxes)
         # Redraw bounding box
         self.update_display()
 
     def get_verified_label_path(self, source_path):
         """Map source image path to its verified dataset label txt file."""
-        train_image_path = self.training_manager.generate_train_name(source_path)
-        return self.training_manager.labels_dir / f"{Path(train_image_path).stem}.txt"
+        return self.training_manager.label_path(source_path)
 
-    def load_detections_from_label_file(self, image_path, label_path):
-        """Load YOLO txt labels and convert normalized boxes back to pixel boxes."""
-        image = cv2.imread(image_path)
-        if image is None:
+    def load_detections_from_label_file(self, image_path, label_path, lines=None):
+        """Load YOLO txt labels and convert normalized boxes back to pixel boxes.
+
+        `lines` are used instead of the file when the label is still queued for writing.
+        """
+        # Only width/height are needed, so read them from the header, not the pixels.
+        size = self.image_sizes.size(image_path)
+        if size is None:
             return []
 
-        img_h, img_w = image.shape[:2]
+        img_w, img_h = size
         detections = []
 
-        if not label_path.exists():
-            return detections
+        if lines is None:
+            if not label_path.exists():
+                return detections
+            lines = label_path.read_text(encoding="utf-8").splitlines()
 
-        for raw_line in label_path.read_text(encoding="utf-8").splitlines():
+        for raw_line in lines:
             parts = raw_line.strip().split()
             if len(parts) != 5:
                 continue
@@ -411,34 +663,66 @@ class ImageLoader(QMainWindow):
 
         return detections
 
-    def load_current_image_data(self):
+    def read_detections(self, path, verified):
         """Load detections from verified labels or live model inference."""
+        if verified:
+            # Verified images are ground-truth: prefer saved labels over inference.
+            label_path = self.get_verified_label_path(path)
+            pending = self.training_manager.pending_label_lines(path)
+            return self.load_detections_from_label_file(path, label_path, pending)
+
+        # Unverified images show current model predictions as a starting point.
+        return self.labeler.get_detections(path)
+
+    def load_image_payload(self, path):
+        """Prefetch worker: detections plus the scaled, unselected render for one image.
+
+        Runs on a pool thread, so it only reads viewer state and never touches widgets.
+        """
+        verified = self.training_manager.is_verified_cached(path)
+        detections = self.read_detections(path, verified)
+
+        frame = self.read_frame(path)
+        if frame is None:
+            return None
+
+        return {
+            "verified": verified,
+            "detections": detections,
+            # Workers own their resized frame; the UI thread uploads it to a pixmap.
+            "display_frame": self.display_scaler.scale(frame, reuse=False),
+        }
+
+    def load_current_image_data(self):
+        """Load detections for the current image, preferring a prefetched payload."""
         self.deletion_bounding_box_cords.clear()
         path = self.filtered_images[self.current_index]
 
-        if self.training_manager.is_verified_cached(path):
-            # Verified images are ground-truth: prefer saved labels over inference.
-            self.verified = True
-            label_path = self.get_verified_label_path(path)
-            self.detections = self.load_detections_from_label_file(path, label_path)
+        payload = self.prefetcher.take(path)
+        if payload is not None:
+            self.verified = payload["verified"]
+            self.detections = payload["detections"]
+            # QPixmap must be created on the UI thread; workers hand over the scaled frame.
+            self.render_cache.put("pixmap", path, frame_to_pixmap(payload["display_frame"]))
         else:
-            # Unverified images show current model predictions as a starting point.
-            self.verified = False
-            self.detections = self.labeler.get_detections(path)
+            self.verified = self.training_manager.is_verified_cached(path)
+            self.detections = self.read_detections(path, self.verified)
 
         self.populate_detections(self.detections, self.labels)
 
+        # Start loading the neighbours while this image is being looked at.
+        self.prefetcher.schedule(self.filtered_images, self.current_index)
+
     def on_detection_selected(self, index):
         if index < 0 or index >= len(self.detections):
             return
 
         det = self.detections[index]
-        x1, y1, x2, y2 = map(int, det["bbox_xyxy"])
 
         combo = self.detection_combos[index]
         combo.setFocus()
 
-        self.update_display([x1, y1, x2, y2], True)
+        self.update_display(det["bbox_xywhn"], True)
 
     def on_detection_label_change(self, index, new_label):
         if index < 0 or index >= len(self.detections):
@@ -451,70 +735,77 @@ class ImageLoader(QMainWindow):
         new_id = self.labels.index(new_label)
         self.detections[index]['class_id'] = new_id
 
+    @staticmethod
+    def render_key(path, verified, detections):
+        """Cache key for the boxes-drawn render of one image in one labelling state."""
+        return (
+            path,
+            verified,
+            tuple(
+                (det["class_name"], round(det["confidence"], 2), tuple(det["bbox_xywhn"]))
+                for det in detections
+            ),
+        )
+
+    def read_frame(self, path):
+        """Display-resolution BGR frame for path, read from disk only on a cache miss."""
+        frame = self.render_cache.get("frame", path)
+        if frame is None:
+            # JPEG DCT scaling decodes just enough pixels for the 1000x700 label.
+            frame, _ = decode_image(path, self.display_scaler.max_width, self.display_scaler.max_height)
+            if frame is None:
+                return None
+            self.render_cache.put("frame", path, frame)
+        return frame
+
+    def base_pixmap(self, path):
+        """Display-sized pixmap of the image with nothing drawn on it; one per image."""
+        pixmap = self.render_cache.get("pixmap", path)
+        if pixmap is None:
+            frame = self.read_frame(path)
+            if frame is None:
+                return None
+            # BGR frame -> shared resize buffer -> pixmap, with no colour conversion.
+            pixmap = frame_to_pixmap(self.display_scaler.scale(frame))
+            self.render_cache.put("pixmap", path, pixmap)
+        return pixmap
+
     def update_display(self, yoloBoxes=None, selection=False):
         # Centralized logic to refresh the image label
         if not self.filtered_images:
             return
         
         path = self.filtered_images[self.current_index]
-        if self.verified:
-            image = cv2.imread(path)
-            if image is None:
+
+        # Boxes are painted in display coordinates over one cached base pixmap,
+        # so selection changes never touch the full-resolution frame.
+        key = self.render_key(path, self.verified, self.detections)
+        overlay = self.render_cache.get("overlay", key)
+        if overlay is None:
+            base = self.base_pixmap(path)
+            if base is None:
                 self.image_label.setText("Unable to load image")
                 return
+            overlay = paint_detections(base, self.detections, self.verified)
+            self.render_cache.put("overlay", key, overlay)
+
+        # Draw box around users selected object, plus any boxes deleted from this image
+        if selection or self.deletion_bounding_box_cords:
+            overlay = paint_highlights(
+                overlay,
+                selected_box=yoloBoxes if selection else None,
+                selected_color=SELECTED_VERIFIED_COLOR if self.verified else SELECTED_COLOR,
+                deleted_boxes=self.deletion_bounding_box_cords,
+            )
 
-            # Verified images use saved labels, not model inference.
-            for det in self.detections:
-                x1, y1, x2, y2 = map(int, det["bbox_xyxy"])
-                cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 6)
-
-                label_text = f"{det['class_name']}"
-                text_y = y1 - 8 if y1 > 12 else y1 + 16
-                cv2.putText(
-                    image,
-                    label_text,
-                    (x1, text_y),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1.5,
-                    (0, 255, 0),
-                    3,
-                    cv2.LINE_AA,
-                )
-
-            color_correction = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        else:
-            # Unverified images should keep YOLO's native plotting behavior.
-            labeled_image = self.labeler.label_image(path)
-            color_correction = cv2.cvtColor(labeled_image, cv2.COLOR_BGR2RGB)
-        
-        # Draw box around users selected object
-        if selection:
-            if self.verified:
-                color = (255, 0, 0) # Green color (BGR format)
-            else:
-                color = (0, 255, 0) # Blue color (BGR format)
-            thickness = 4
-            cv2.rectangle(color_correction, (yoloBoxes[0], yoloBoxes[1]), (yoloBoxes[2], yoloBoxes[3]), color, thickness) #type: ignore
-        if len(self.deletion_bounding_box_cords):
-            color = (255, 0, 0) # Red color (BGR format)
-            thickness = 5
-            for box in self.deletion_bounding_box_cords:
-                cv2.rectangle(color_correction, (box[0], box[1]), (box[2], box[3]), color, thickness)
-
-            
-        pil_image = Image.fromarray(color_correction)
-        pixmap = QPixmap.fromImage(pil_image.toqimage())
-        scaled_pixmap = pixmap.scaled(
-            1000,
-            700,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
+        self.show_pixmap(overlay)
 
-        self.image_label.setPixmap(scaled_pixmap)
+    def show_pixmap(self, pixmap):
+        """Put a scaled render on screen and sync list selection + verification widgets."""
+        self.image_label.setPixmap(pixmap)
         
-        if self.current_index < self.image_list.count():
-            self.image_list.setCurrentRow(self.current_index)
+        if self.current_index < len(self.image_list_model.paths):
+            self.select_list_row(self.current_index)
 
         if self.verified:
             self.verification_status.setText("Verified")
@@ -547,12 +838,14 @@ class ImageLoader(QMainWindow):
             return
         # Convert edited detections to YOLO txt lines before writing to dataset.
         label_lines = self.labeler.to_yolo_label_lines(self.detections)
+        storage_mode = self.training_manager.storage.mode_for(source)
         new_path, label_path = self.training_manager.verify_image(source, label_lines)
+        self.forget_rendered_image(source)
 
         show_info(
             self,
             "Verified",
-            f"Copied to:\n{new_path.name}\n\nLabel saved:\n{label_path.name}"
+            f"Saving to ({storage_mode}):\n{new_path.name}\n\nLabel:\n{label_path.name}"
         )
         self.verification_status.setText("Verified")
         self.verification_status.setStyleSheet("color: green; font-weight: bold;")
@@ -561,6 +854,12 @@ class ImageLoader(QMainWindow):
 
         self.next_image() # automatically scroll to next image (less button clicking)
 
+    def forget_rendered_image(self, path):
+        """Drop stored renders of an image whose verified state just changed."""
+        self.prefetcher.discard(path)
+        # Frame and base pixmap are still valid; only drawn boxes depend on labels.
+        self.render_cache.discard(path, layers=("overlay",))
+
     def unverify_image(self):
         """Remove image/label pair from verified training dataset."""
         if not self.filtered_images:
@@ -578,6 +877,7 @@ class ImageLoader(QMainWindow):
 
         # Delete verified training dataset copy + label file
         self.training_manager.unverify_image(source)
+        self.forget_rendered_image(source)
 
         show_info(
             self,
@@ -592,46 +892,135 @@ class ImageLoader(QMainWindow):
         self.image_label.setStyleSheet("")
   
 
-    def get_imgs(self, drive, new_dir=False):
-        if(new_dir):
-            self.images.clear()
-            self.deletion_bounding_box_cords.clear()
-        imgs = []
-        if os.path.exists(drive):
-            for filename in os.listdir(drive):
-                # Check for image extension AND ensure it doesn't start with '.'
-                if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif')):
-                    if not filename.startswith('.'): 
-                        img_path = os.path.join(drive, filename)   
-                        imgs.append(img_path)
-
-        self.images = imgs
-        self.filtered_images = list(imgs)
-        if not imgs:
-            show_no_images_popup(self)
-            return
-
-        return 
-    
     def open_dir_dialog(self):
         dir_name = pick_directory(self, "Select a Directory")
         if dir_name:
             path = Path(dir_name)
-            self.current_index = 0
             self.drive = str(path)
 
+            # Finish the old dataset's writes before switching managers.
+            self.training_manager.flush()
+            self.make_training_manager(self.drive)
+            self.make_trash(self.drive)
+            self.update_trash_buttons()
+            self.start_folder_scan(self.drive)
+
+    def start_folder_scan(self, drive):
+        """Clear the current dataset and stream a recursive scan of drive into it."""
+        self.folder_watcher.stop()
+        self.prefetcher.cancel()
+        self.prelabeler.cancel()
+        self.prelabel_button.setEnabled(True)
+        self.prelabel_status.setText("")
+        self.images = []
+        self.filtered_images = []
+        self.current_index = 0
+        self.deletion_bounding_box_cords.clear()
+        self.load_image_list()
+
+        self.image_label.setText("Loading images...")
+        self.folder_scanner.start(drive)
+
+    def on_scan_chunk(self, paths):
+        """Append one streamed chunk and show the first image as soon as it arrives."""
+        self.add_images(paths)
+
+    def add_images(self, paths):
+        """Append new image paths to the dataset, the active filter and the list."""
+        first_chunk = not self.filtered_images
+
+        self.images.extend(paths)
+        # Dataset names are computed once per chunk, not per lookup.
+        self.training_manager.index_sources(paths)
+
+        if self.filter_mode == "all":
+            new_images = paths
+        else:
+            flags = self.training_manager.verified_flags(paths)
+            wanted = self.filter_mode == "verified"
+            new_images = [img for img, is_verified in zip(paths, flags) if is_verified == wanted]
+
+        self.filtered_images.extend(new_images)
+
+        # The model applies an active search to the appended rows itself.
+        self.image_list_model.append_paths(new_images)
+
+        if first_chunk and self.filtered_images:
+            self.current_index = 0
+            self.select_list_row(0)
+            self.load_current_image_data()
+            self.update_display()
+
+    def remove_images(self, paths):
+        """Drop deleted or renamed-away images without rescanning the folder."""
+        gone = set(paths)
+        current = self.filtered_images[self.current_index] if self.filtered_images else None
+
+        self.images = [img for img in self.images if img not in gone]
+
+        rows = [row for row, img in enumerate(self.filtered_images) if img in gone]
+        if not rows:
+            return
 
-            self.get_imgs(self.drive, True)
+        for row in reversed(rows):
+            del self.filtered_images[row]
+        if len(rows) == 1:
+            self.image_list_model.remove_row(rows[0])
+        else:
             self.load_image_list()
 
-            if self.images:
-                self.image_list.setCurrentRow(0)
-                self.update_display()
-            else:
-                self.image_label.setText("No images found")
-            
-            
-            self.training_manager = TrainingManager(self.drive)
+        for path in gone:
+            self.prefetcher.discard(path)
+            self.render_cache.discard(path)
+
+        if not self.filtered_images:
+            self.current_index = 0
+            self.image_label.clear()
+            self.image_label.setText("No images found" if not self.images else "No images match filter")
+            return
+
+        if current in gone:
+            # Stay at the same position, which now holds the next image.
+            shift = sum(1 for row in rows if row < self.current_index)
+            self.current_index = min(self.current_index - shift, len(self.filtered_images) - 1)
+            self.load_current_image_data()
+            self.update_display()
+        else:
+            self.current_index = self.filtered_images.index(current)
+            self.select_list_row(self.current_index)
+
+    def on_scan_finished(self, total):
+        print(f"Found {total} images under {self.drive}")
+        self.folder_watcher.start(self.drive)
+        if not self.images:
+            self.image_label.setText("No images found")
+            show_no_images_popup(self)
+        elif not self.filtered_images:
+            self.image_label.setText("No images match filter")
+
+    def closeEvent(self, event):
+        """Stop background scanning and prefetching when the viewer closes."""
+        self.folder_scanner.cancel()
+        self.folder_watcher.stop()
+        self.prefetcher.cancel()
+        self.prelabeler.cancel()
+        self.prelabeler.wait()
+        # Let queued trash moves and dataset writes finish so no file is left half-written.
+        self.trash.wait()
+        self.training_manager.flush()
+        print(f"Viewer session stats: {self.performance_stats()}")
+        event.accept()
+
+    def performance_stats(self) -> dict:
+        """Counters of the caches, inference shortcuts and dataset writes since startup."""
+        return {
+            "render_cache": self.render_cache.stats(),
+            "prefilter": self.labeler.prefilter.stats(),
+            "bursts": dict(self.labeler.burst_stats),
+            "cascade": self.labeler.cascade_stats(),
+            "journal": self.training_manager.journal.stats(),
+            "storage": self.training_manager.storage.stats(),
+        }
 
     def menu_window(self):
         from home_menu import MenuWindow
@@ -661,18 +1050,17 @@ class ImageLoader(QMainWindow):
 
     def apply_filter(self, mode):
         self.filter_mode = mode
+        self.prefetcher.cancel()
 
         if mode == "all":
             self.filtered_images = list(self.images)
-        elif mode == "verified":
-            self.filtered_images = [
-                img for img in self.images
-                if self.training_manager.is_verified_cached(img)
-            ]
-        elif mode == "unverified":
+        else:
+            # One batched lookup against the memoized source -> dataset name index.
+            flags = self.training_manager.verified_flags(self.images)
+            wanted = mode == "verified"
             self.filtered_images = [
-                img for img in self.images
-                if not self.training_manager.is_verified_cached(img)
+                img for img, is_verified in zip(self.images, flags)
+                if is_verified == wanted
             ]
 
         self.current_index = 0
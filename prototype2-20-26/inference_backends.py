@@ -0,0 +1,332 @@
+"""Interchangeable inference backends for `ImageLabeler`.
+
+`TorchBackend` runs the Ultralytics PyTorch model. `OnnxBackend` runs the
+same weights exported to ONNX on ONNX Runtime's CPU provider, with letterbox,
+confidence filtering and NMS done in NumPy, so the viewer does not import
+torch at all once the export exists.
+
+The export is written next to the checkpoint (`best.pt` -> `best.onnx`) on
+first use and checked against the Torch model before it is trusted. The
+result is recorded in `best.onnx.json` with the checkpoint hash, so later
+starts load the .onnx directly and a new checkpoint triggers a new export.
+
+Both backends are called with a list of BGR frames and return one result per
+frame whose `boxes` expose `cls`, `conf`, `xyxy` and `xywhn` in that frame's
+pixels, plus `names`, matching Ultralytics `Results`.
+"""
+
+from pathlib import Path
+import ast
+import importlib.util
+import json
+
+import cv2
+import numpy as np
+
+from file_hashing import full_file_digest
+
+
+# Ultralytics predict() default confidence threshold.
+DEFAULT_CONF = 0.25
+
+def letterbox(image: np.ndarray, size: int, fill: int = 114):
+    """Resize to fit a size x size square and pad, matching YOLO's letterbox.
+
+    Returns the padded canvas, the resize ratio and the (x, y) padding offsets.
+    """
+    img_h, img_w = image.shape[:2]
+    ratio = min(size / img_h, size / img_w)
+    new_w, new_h = round(img_w * ratio), round(img_h * ratio)
+
+    if (new_w, new_h) != (img_w, img_h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    pad_x = (size - new_w) // 2
+    pad_y = (size - new_h) // 2
+    canvas = np.full((size, size, 3), fill, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = image
+    return canvas, ratio, (pad_x, pad_y)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression over (x1, y1, x2, y2) boxes; returns kept indices."""
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        x1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-9)
+
+        order = rest[iou <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+class ArrayBoxes:
+    """Minimal stand-in for Ultralytics `Boxes` backed by NumPy arrays."""
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, shape):
+        img_h, img_w = shape
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+        xywh = np.empty_like(xyxy)
+        xywh[:, 0] = (xyxy[:, 0] + xyxy[:, 2]) / 2.0
+        xywh[:, 1] = (xyxy[:, 1] + xyxy[:, 3]) / 2.0
+        xywh[:, 2] = xyxy[:, 2] - xyxy[:, 0]
+        xywh[:, 3] = xyxy[:, 3] - xyxy[:, 1]
+        self.xywhn = xywh / np.array([img_w, img_h, img_w, img_h], dtype=np.float32)
+        self.shape = shape
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, index):
+        return ArrayBoxes(self.xyxy[index], self.conf[index], self.cls[index], self.shape)
+
+
+class ArrayResult:
+    def __init__(self, boxes: ArrayBoxes, names: dict):
+        self.boxes = boxes
+        self.names = names
+
+    def __getitem__(self, index):
+        # Same as indexing an Ultralytics Results: selects boxes.
+        return ArrayResult(self.boxes[index], self.names)
+
+
+class TorchBackend:
+    """Ultralytics PyTorch model; importing it is what pulls in torch."""
+
+    name = "torch"
+    # Results carry Ultralytics' own plot().
+    can_plot = True
+
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+
+        self.model_path = Path(model_path)
+        self.model = YOLO(self.model_path)
+        self.names = self.model.names
+        # Training image size; frames are decoded no larger than needed for it.
+        self.imgsz = int(self.model.overrides.get("imgsz") or 640)
+
+    def __call__(self, frames: list, **kwargs) -> list:
+        return list(self.model(frames, **kwargs))
+
+
+class OnnxBackend:
+    """Exported model on ONNX Runtime's CPU execution provider."""
+
+    name = "onnx"
+    can_plot = False
+
+    def __init__(self, onnx_path, iou_threshold: float = 0.7, max_det: int = 300):
+        import onnxruntime as ort
+
+        self.onnx_path = Path(onnx_path)
+        self.session = ort.InferenceSession(str(self.onnx_path), providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # Ultralytics stores class names and image size in the model metadata.
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata.get("names", "{}"))
+        imgsz = ast.literal_eval(metadata.get("imgsz", "[640, 640]"))
+        self.imgsz = int(imgsz[0] if isinstance(imgsz, (list, tuple)) else imgsz)
+
+        # Same defaults as Ultralytics predict().
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+
+    def __call__(self, frames: list, conf: float = DEFAULT_CONF, **kwargs) -> list:
+        canvases = []
+        transforms = []
+        for frame in frames:
+            canvas, ratio, pad = letterbox(frame, self.imgsz)
+            canvases.append(canvas)
+            transforms.append((ratio, pad, frame.shape[:2]))
+
+        # BGR HWC uint8 -> RGB NCHW float32 in [0, 1].
+        batch = np.stack(canvases)[..., ::-1].transpose(0, 3, 1, 2)
+        batch = np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+        outputs = self.session.run(None, {self.input_name: batch})[0]
+        return [
+            self.postprocess(prediction, conf, *transform)
+            for prediction, transform in zip(outputs, transforms)
+        ]
+
+    def postprocess(self, prediction: np.ndarray, conf: float, ratio: float, pad, shape) -> ArrayResult:
+        """Decode one (4 + classes, anchors) output into boxes in the input frame's pixels."""
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        mask = confidences >= conf
+        xywh = prediction[mask, :4]
+        confidences = confidences[mask]
+        class_ids = class_ids[mask]
+
+        xyxy = np.empty_like(xywh)
+        xyxy[:, 0] = xywh[:, 0] - xywh[:, 2] / 2.0
+        xyxy[:, 1] = xywh[:, 1] - xywh[:, 3] / 2.0
+        xyxy[:, 2] = xywh[:, 0] + xywh[:, 2] / 2.0
+        xyxy[:, 3] = xywh[:, 1] + xywh[:, 3] / 2.0
+
+        # Per-class NMS in one pass: shift each class into its own coordinate range.
+        offsets = class_ids[:, None].astype(np.float32) * 7680.0
+        keep = nms(xyxy + offsets, confidences, self.iou_threshold)[:self.max_det]
+        xyxy, confidences, class_ids = xyxy[keep], confidences[keep], class_ids[keep]
+
+        # Undo the letterbox so boxes are in the caller's frame pixels.
+        img_h, img_w = shape
+        pad_x, pad_y = pad
+        xyxy[:, [0, 2]] = np.clip((xyxy[:, [0, 2]] - pad_x) / ratio, 0, img_w)
+        xyxy[:, [1, 3]] = np.clip((xyxy[:, [1, 3]] - pad_y) / ratio, 0, img_h)
+
+        boxes = ArrayBoxes(
+            xyxy.astype(np.float32),
+            confidences.astype(np.float32),
+            class_ids.astype(np.float32),
+            shape,
+        )
+        return ArrayResult(boxes, self.names)
+
+
+def detections_agree(expected, actual, min_iou: float = 0.8, max_conf_delta: float = 0.05) -> bool:
+    """True when two results hold the same boxes (same class, overlapping, similar confidence)."""
+    if len(expected.boxes) != len(actual.boxes):
+        return False
+
+    unmatched = list(range(len(actual.boxes)))
+    actual_xyxy = np.asarray(actual.boxes.xyxy.tolist(), dtype=np.float32).reshape(-1, 4)
+    actual_conf = actual.boxes.conf.tolist()
+    actual_cls = actual.boxes.cls.tolist()
+
+    for box, box_conf, box_cls in zip(
+        expected.boxes.xyxy.tolist(), expected.boxes.conf.tolist(), expected.boxes.cls.tolist()
+    ):
+        match = None
+        for index in unmatched:
+            if int(actual_cls[index]) != int(box_cls) or abs(actual_conf[index] - box_conf) > max_conf_delta:
+                continue
+            other = actual_xyxy[index]
+            inter_w = max(0.0, min(box[2], other[2]) - max(box[0], other[0]))
+            inter_h = max(0.0, min(box[3], other[3]) - max(box[1], other[1]))
+            inter = inter_w * inter_h
+            union = (box[2] - box[0]) * (box[3] - box[1]) + (other[2] - other[0]) * (other[3] - other[1]) - inter
+            if union > 0 and inter / union >= min_iou:
+                match = index
+                break
+        if match is None:
+            return False
+        unmatched.remove(match)
+
+    return True
+
+
+def sample_frames(limit: int = 8) -> list:
+    """A few verified dataset images to compare backends on, plus a blank frame."""
+    frames = [np.full((480, 640, 3), 114, dtype=np.uint8)]
+    images_dir = Path.cwd() / "verified_images" / "dataset" / "images"
+    if images_dir.exists():
+        for path in sorted(images_dir.iterdir())[:limit]:
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                frames.append(frame)
+    return frames
+
+
+def export_onnx(torch_backend: TorchBackend) -> Path:
+    """Export the checkpoint to ONNX next to it (dynamic batch/size, for CPU)."""
+    exported = torch_backend.model.export(format="onnx", imgsz=torch_backend.imgsz, dynamic=True)
+    return Path(exported)
+
+
+def prepare_onnx_backend(model_path) -> tuple[OnnxBackend | None, TorchBackend | None]:
+    """Return (verified ONNX backend or None, Torch backend if one was loaded on the way).
+
+    The ONNX backend is None (use Torch) when ONNX Runtime is missing, the
+    export fails or its output does not match the Torch model. The checkpoint
+    is exported on first use; a Torch backend loaded for that is handed back
+    so a fallback does not load it again.
+    """
+    if importlib.util.find_spec("onnxruntime") is None:
+        # Checked first: exporting without a runtime to load the file would repeat every start.
+        print("ONNX Runtime is not installed")
+        return None, None
+
+    model_path = Path(model_path)
+    onnx_path = model_path.with_suffix(".onnx")
+    marker_path = onnx_path.with_name(onnx_path.name + ".json")
+    digest = full_file_digest(model_path)
+
+    try:
+        marker = json.loads(marker_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        marker = {}
+
+    if marker.get("model_digest") == digest:
+        if not marker.get("verified"):
+            # Already tried this checkpoint and it did not match; do not re-export every start.
+            return None, None
+        if onnx_path.exists():
+            try:
+                return OnnxBackend(onnx_path), None
+            except Exception as e:
+                print(f"Could not load {onnx_path}: {e}")
+                return None, None
+
+    torch_backend = None
+    try:
+        torch_backend = TorchBackend(model_path)
+        onnx_path = export_onnx(torch_backend)
+        onnx_backend = OnnxBackend(onnx_path)
+    except Exception as e:
+        print(f"ONNX export unavailable for {model_path}: {e}")
+        return None, torch_backend
+
+    frames = sample_frames()
+    conf = DEFAULT_CONF
+    verified = all(
+        detections_agree(expected, actual)
+        for expected, actual in zip(
+            torch_backend([frame for frame in frames], conf=conf, verbose=False),
+            onnx_backend(frames, conf=conf),
+        )
+    )
+    print(f"ONNX export {onnx_path.name} {'matches' if verified else 'does not match'} Torch on {len(frames)} frames")
+
+    marker_path.write_text(
+        json.dumps({"model_digest": digest, "verified": verified, "frames": len(frames)}),
+        encoding="utf-8",
+    )
+    return (onnx_backend if verified else None), torch_backend
+
+
+def load_onnx_backend(model_path) -> OnnxBackend | None:
+    """Return a verified ONNX backend for the checkpoint, exporting it on first use, or None."""
+    return prepare_onnx_backend(model_path)[0]
+
+
+def load_backend(model_path, backend: str = "torch"):
+    """Load a checkpoint on the requested backend, falling back to Torch."""
+    if backend == "onnx":
+        onnx_backend, torch_backend = prepare_onnx_backend(model_path)
+        if onnx_backend is not None:
+            return onnx_backend
+        print(f"Falling back to the Torch backend for {model_path}")
+        if torch_backend is not None:
+            return torch_backend
+    return TorchBackend(model_path)
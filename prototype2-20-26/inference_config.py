@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class InferenceConfig:
+    """Which checkpoints `ImageLabeler` loads and how they are combined.
+
+    Paths are relative to the working directory, like the `Models/` folder
+    that training copies new checkpoints into.
+    """
+
+    # Main (large) checkpoint; the only model used when the cascade is off.
+    model: str = "Models/best_3-3-2026.pt"
+    # "torch" (Ultralytics/PyTorch) or "onnx" (ONNX Runtime on CPU, exported on first use).
+    backend: str = "torch"
+    # Screen every image with a small model and escalate only uncertain ones.
+    cascade: bool = False
+    # Nano-class checkpoint that screens images in cascade mode.
+    screen_model: str = "Models/best_nano.pt"
+    # Images whose highest screen confidence lies in [low, high) go to the main model.
+    # Below low the screen model saw nothing worth checking; at or above high it is sure.
+    uncertain_low: float = 0.15
+    uncertain_high: float = 0.6
+    # INT8 mode for CPU: None, "dynamic" or "static" (calibrated on verified images).
+    quantize: str | None = None
+    # Largest allowed mAP@0.5 drop versus FP32 on the verified set.
+    quantize_max_map_drop: float = 0.01
+    # Largest allowed recall drop for any single class versus FP32.
+    quantize_max_recall_drop: float = 0.03
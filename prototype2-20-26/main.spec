@@ -3,7 +3,7 @@ from PyInstaller.utils.hooks import collect_all
 
 datas = [('classes.txt', '.'), ('data.yaml', '.'), ('Models', 'Models')]
 binaries = []
-hiddenimports = ['torch', 'torchvision']
+hiddenimports = ['torch', 'torchvision', 'onnxruntime']
 tmp_ret = collect_all('ultralytics')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 
@@ -1,29 +1,509 @@
 """Prediction helpers wrapping Ultralytics YOLO outputs for the GUI layer."""
 
-from ultralytics import YOLO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import copy
+import os
+import threading
+import time
+import cv2
 import numpy as np
+from burst_grouping import BurstIndex
+from detection_tracking import propagate_detections
+from empty_prefilter import EmptyFramePrefilter
+from file_hashing import fast_file_digest, full_file_digest
+from image_decode import decode_image
+from image_metadata import read_capture_time
+from inference_backends import DEFAULT_CONF, letterbox, load_backend
+from inference_config import InferenceConfig
+from model_quantization import cached_quantized_backend, load_quantized_backend
+from prediction_cache import PredictionCache
 
 class ImageLabeler:
-    def __init__(self):
+    def __init__(self, max_cached_results: int = 8, config: InferenceConfig | None = None):
+        self.config = config or InferenceConfig()
+
         # Resolve full model path
-        full_model_path = Path.cwd() /"Models/best_3-3-2026.pt"
-        # Model is loaded once so repeated image predictions are fast.
-        self.model = YOLO(full_model_path)
+        full_model_path = Path.cwd() / self.config.model
+        self.model_path = full_model_path
+        # Model is loaded once so repeated image predictions are fast. The ONNX
+        # backend runs on CPU without torch; it falls back to Torch if unavailable.
+        self.model = load_backend(full_model_path, self.config.backend)
+        # An INT8 model already accepted for these weights is used right away; building
+        # and checking a new one runs in the background (see load_quantized_model).
+        self.quantized_path = None
+        quantize_pending = False
+        if self.config.quantize:
+            quantized, decided = cached_quantized_backend(
+                full_model_path,
+                self.config.quantize,
+                self.config.quantize_max_map_drop,
+                self.config.quantize_max_recall_drop,
+            )
+            if quantized is not None:
+                self.model = quantized
+                self.quantized_path = quantized.onnx_path
+            quantize_pending = not decided
+
+        # Cascade mode keeps a small screening model resident next to the main one.
+        self.screen_model = None
+        self.screen_model_path = None
+        if self.config.cascade:
+            screen_path = Path.cwd() / self.config.screen_model
+            if screen_path.exists():
+                self.screen_model_path = screen_path
+                self.screen_model = load_backend(screen_path, self.config.backend)
+            else:
+                print(f"Cascade disabled: screening model {screen_path} not found")
+
+        # Images through the models, how many escalated, and time spent in forward passes.
+        self.inference_stats = {
+            "images": 0,
+            "escalated": 0,
+            "seconds": 0.0,
+            "batch_images": 0,
+            "batch_seconds": 0.0,
+        }
+        # Training image size; frames are decoded no larger than needed for it.
+        self.imgsz = self.model.imgsz
+
+        # Recent (result, decode scale) pairs keyed by (image, model) so one image is
+        # never inferred twice while the viewer redraws it. Results hold the frame.
+        self.max_cached_results = max_cached_results
+        self.results = OrderedDict()
+
+        # The viewer prefetches from pool threads; Ultralytics predictors are not
+        # thread-safe, so model calls and the result LRU share one lock.
+        self.lock = threading.RLock()
+
+        # Detections survive restarts in SQLite; the weights hash invalidates them
+        # automatically whenever a new model is copied into Models/.
+        self.model_fingerprint = full_file_digest(full_model_path)
+        if self.screen_model is not None:
+            # Cascade output depends on both checkpoints and the band.
+            self.model_fingerprint += (
+                f"+{full_file_digest(self.screen_model_path)}"
+                f"@{self.config.uncertain_low}-{self.config.uncertain_high}"
+            )
+        if self.quantized_path is not None:
+            self.model_fingerprint += self.quantization_tag()
+        self.prediction_cache = PredictionCache()
+        self.prediction_cache.set_model(self.model_fingerprint)
+
+        # Background-difference check that lets predict_many skip likely-empty
+        # frames. It only sees predict_many's frames, in capture order; the
+        # viewer's prefetch order would scramble each camera's background.
+        self.prefilter = EmptyFramePrefilter()
+        self.skip_likely_empty = True
+
+        # Only the first frame of a burst is inferred; siblings get its boxes
+        # tracked forward and are inferred only when tracking is not trusted.
+        self.bursts = BurstIndex()
+        self.propagate_bursts = True
+        # result key -> propagated detections; kept out of the persistent cache
+        # because they are estimates, not model output.
+        self.propagated = OrderedDict()
+        self.max_propagated = 512
+        self.burst_stats = {"inferred": 0, "propagated": 0, "reinferred": 0}
+
+        if quantize_pending:
+            threading.Thread(target=self.load_quantized_model, name="int8-quantize", daemon=True).start()
+
+    def quantization_tag(self) -> str:
+        """Fingerprint suffix for the INT8 model, so its detections never mix with FP32 ones."""
+        return f"+int8-{self.config.quantize}:{full_file_digest(self.quantized_path)}"
+
+    def load_quantized_model(self):
+        """Background thread: build and check the INT8 model, and swap it in if accepted."""
+        quantized = load_quantized_backend(
+            self.model,
+            self.model_path,
+            self.config.quantize,
+            self.config.quantize_max_map_drop,
+            self.config.quantize_max_recall_drop,
+            lock=self.lock,
+        )
+        if quantized is None:
+            return
+
+        with self.lock:
+            self.model = quantized
+            self.quantized_path = quantized.onnx_path
+            self.model_fingerprint += self.quantization_tag()
+            self.prediction_cache.set_model(self.model_fingerprint)
+            # In-memory results came from the FP32 model.
+            self.results.clear()
+            self.propagated.clear()
+        print(f"Switched to the INT8 {self.config.quantize} model")
+
+    def result_key(self, image_path: str) -> tuple:
+        """Identify one prediction by image path, file version and loaded model."""
+        path = str(Path(image_path))
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = 0
+        return (path, mtime_ns, str(self.model_path))
 
     def predict(self, image_path: str):
-        """Run inference and return first result object for a single image path."""
-        results = self.model(image_path, verbose=False)
-        return results[0]
+        """Return the YOLO result for an image, running inference at most once per (image, model).
+
+        The frame is decoded at reduced resolution, so result boxes are in decoded
+        pixels; use get_detections for full-resolution coordinates.
+        """
+        return self.predict_entry(image_path)[0]
+
+    def predict_entry(self, image_path: str) -> tuple:
+        """Return (result, scale) where scale maps result pixels to full resolution."""
+        key = self.result_key(image_path)
+
+        with self.lock:
+            cached = self.results.get(key)
+            if cached is not None:
+                self.results.move_to_end(key)
+                return cached
+
+            # DCT-scaled decode: the model letterboxes to imgsz anyway.
+            frame, scale = decode_image(image_path, self.imgsz, self.imgsz)
+            if frame is None:
+                raise FileNotFoundError(image_path)
+
+            results = self.run_models([frame])
+            entry = (results[0], scale)
+
+            self.results[key] = entry
+            while len(self.results) > self.max_cached_results:
+                self.results.popitem(last=False)
+
+        return entry
 
    
-    def label_image(self, image_path: str) -> np.ndarray:
-        """Return image array with YOLO-drawn boxes/labels."""
-        return self.predict(image_path).plot()
-    
+    def run_models(self, frames: list, **kwargs) -> list:
+        """Forward frames through the cascade, or the main model alone. Caller holds self.lock.
+
+        In cascade mode every frame goes through the screening model; frames
+        whose highest confidence is in the uncertain band are run again on the
+        main model and take its result. The others keep the screening result,
+        cut back to the normal confidence threshold.
+        """
+        start = time.perf_counter()
+
+        if self.screen_model is None:
+            results = list(self.model(frames, batch=len(frames), verbose=False, **kwargs))
+            escalated = 0
+        else:
+            conf = kwargs.pop("conf", DEFAULT_CONF)
+            # Screen at the band's lower edge so weak boxes are visible to the check.
+            results = list(self.screen_model(
+                frames, batch=len(frames), conf=min(conf, self.config.uncertain_low), verbose=False, **kwargs
+            ))
+            uncertain = [index for index, result in enumerate(results) if self.is_uncertain(result)]
+            if uncertain:
+                escalated_results = self.model(
+                    [frames[index] for index in uncertain], batch=len(uncertain), conf=conf, verbose=False, **kwargs
+                )
+                for index, result in zip(uncertain, escalated_results):
+                    results[index] = result
+            escalated = len(uncertain)
+
+            # Screen results that were kept still hold the low-confidence boxes.
+            kept = set(range(len(results))) - set(uncertain)
+            for index in kept:
+                results[index] = self.drop_below(results[index], conf)
+
+        self.inference_stats["images"] += len(frames)
+        self.inference_stats["escalated"] += escalated
+        self.inference_stats["seconds"] += time.perf_counter() - start
+        return results
+
+    def is_uncertain(self, result) -> bool:
+        """True when the screening result's top confidence falls in the escalation band."""
+        boxes = result.boxes
+        top = float(boxes.conf.max()) if boxes is not None and len(boxes) else 0.0
+        return self.config.uncertain_low <= top < self.config.uncertain_high
+
+    @staticmethod
+    def drop_below(result, conf: float):
+        """Result without its boxes under conf."""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return result
+        keep = [index for index, value in enumerate(boxes.conf.tolist()) if value >= conf]
+        if len(keep) == len(boxes):
+            return result
+        return result[keep]
+
+    def cascade_stats(self) -> dict:
+        """Escalation rate and end-to-end model throughput since startup."""
+        with self.lock:
+            stats = dict(self.inference_stats)
+
+        stats["cascade"] = self.screen_model is not None
+        stats["escalation_rate"] = stats["escalated"] / stats["images"] if stats["images"] else 0.0
+        stats["images_per_sec"] = stats["images"] / stats["seconds"] if stats["seconds"] else 0.0
+        stats["end_to_end_images_per_sec"] = (
+            stats["batch_images"] / stats["batch_seconds"] if stats["batch_seconds"] else 0.0
+        )
+        return stats
+
+    def label_image(self, image_path: str, image: np.ndarray | None = None) -> np.ndarray:
+        """Return image array with YOLO-drawn boxes/labels.
+
+        `image` is an already decoded BGR frame, used to avoid a second disk read
+        when the detections come from the persistent cache.
+        """
+        detections = self.get_detections(image_path)
+
+        with self.lock:
+            entry = self.results.get(self.result_key(image_path))
+        if entry is not None and self.model.can_plot:
+            return entry[0].plot()
+
+        # Detections came from the persistent cache, so plot them without inference.
+        return self.plot_detections(image_path, detections, image)
+
     def get_detections(self, image_path: str) -> list[dict]:
         """Convert raw YOLO boxes into plain dictionaries for UI consumption."""
-        result = self.predict(image_path)
+        with self.lock:
+            entry = self.results.get(self.result_key(image_path))
+        if entry is not None:
+            return self.detections_from_result(*entry)
+
+        image_key = fast_file_digest(image_path)
+        cached = self.prediction_cache.get(image_key)
+        if cached is not None:
+            return cached
+
+        if self.propagate_bursts:
+            propagated = self.propagate_from_burst(image_path)
+            if propagated is not None:
+                return propagated
+
+        fingerprint = self.model_fingerprint
+        detections = self.detections_from_result(*self.predict_entry(image_path))
+        # Not stored if the INT8 model was swapped in meanwhile.
+        if fingerprint == self.model_fingerprint:
+            self.prediction_cache.put(image_key, detections)
+        with self.lock:
+            self.burst_stats["inferred"] += 1
+        return detections
+
+    def propagate_from_burst(self, image_path: str) -> list[dict] | None:
+        """Track the previous burst frame's detections into this one, or None to infer."""
+        key = self.result_key(image_path)
+        with self.lock:
+            cached = self.propagated.get(key)
+            if cached is not None:
+                self.propagated.move_to_end(key)
+                return copy.deepcopy(cached)
+
+        previous = self.bursts.previous_frame(image_path)
+        if previous is None:
+            # First frame of its burst: the keyframe.
+            return None
+
+        # Recurses back to the keyframe, which is the only frame inferred when tracking holds.
+        previous_detections = self.get_detections(previous)
+
+        prev_frame, _ = decode_image(previous, self.imgsz, self.imgsz)
+        frame, scale = decode_image(image_path, self.imgsz, self.imgsz)
+        if prev_frame is None or frame is None:
+            return None
+
+        detections, _ = propagate_detections(prev_frame, previous_detections, frame, scale)
+
+        with self.lock:
+            if detections is None:
+                self.burst_stats["reinferred"] += 1
+                return None
+
+            self.burst_stats["propagated"] += 1
+            self.propagated[key] = detections
+            while len(self.propagated) > self.max_propagated:
+                self.propagated.popitem(last=False)
+        return copy.deepcopy(detections)
+
+    def plot_detections(self, image_path: str, detections: list[dict], image: np.ndarray | None = None) -> np.ndarray:
+        """Draw stored detections with YOLO's own plotting, without running the model."""
+        # Imported here so the ONNX backend can run without torch until something is plotted.
+        from ultralytics.engine.results import Results
+
+        if image is None:
+            image = cv2.imread(image_path)
+        if image is None:
+            raise FileNotFoundError(image_path)
+
+        # Rebuild the xyxy/conf/cls rows that Ultralytics' Boxes expects. Normalized
+        # boxes keep this correct for frames decoded at reduced resolution.
+        img_h, img_w = image.shape[:2]
+        rows = []
+        for det in detections:
+            x_center, y_center, width, height = det["bbox_xywhn"]
+            rows.append([
+                (x_center - width / 2.0) * img_w,
+                (y_center - height / 2.0) * img_h,
+                (x_center + width / 2.0) * img_w,
+                (y_center + height / 2.0) * img_h,
+                det["confidence"],
+                det["class_id"],
+            ])
+        boxes = np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+        return Results(image, path=image_path, names=self.model.names, boxes=boxes).plot()
+
+    def predict_many(self, image_paths, batch_size: int = 16, workers: int | None = None):
+        """Yield (image_path, detections) for many images using batched forward passes.
+
+        Cached images are answered from the prediction store. Misses are decoded
+        and letterboxed in a thread pool one batch ahead of the model, so disk
+        reads overlap with inference. With `skip_likely_empty`, frames the
+        prefilter marks as likely empty yield [] without a forward pass (and are
+        not cached), except for a sampled share kept to audit the prefilter.
+        Pass frames of one camera in capture order; the scanner's sorted
+        listing already is for camera-numbered file names.
+        """
+        image_paths = [str(path) for path in image_paths]
+        imgsz = self.imgsz
+        started = time.perf_counter()
+        workers = workers or min(8, os.cpu_count() or 1)
+
+        chunks = [
+            image_paths[start:start + batch_size]
+            for start in range(0, len(image_paths), batch_size)
+        ]
+        if not chunks:
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Keep exactly one batch decoding while the current batch is on the model.
+            next_prepared = [pool.submit(self.prepare_batch_item, path, imgsz) for path in chunks[0]]
+
+            for chunk_index in range(len(chunks)):
+                prepared = [future.result() for future in next_prepared]
+
+                if chunk_index + 1 < len(chunks):
+                    next_prepared = [
+                        pool.submit(self.prepare_batch_item, path, imgsz)
+                        for path in chunks[chunk_index + 1]
+                    ]
+
+                misses = []
+                for item in prepared:
+                    if item["canvas"] is None:
+                        continue
+
+                    # Scored here, in order, so each camera's background advances frame by frame.
+                    _, likely_empty = self.prefilter.observe(
+                        item["path"], item["thumbnail"], item["capture_time"]
+                    )
+                    if likely_empty and self.skip_likely_empty and self.prefilter.should_skip():
+                        continue
+                    misses.append(item)
+
+                batch_results = []
+                if misses:
+                    # Equal-sized letterboxed frames let Ultralytics stack one tensor per batch.
+                    with self.lock:
+                        fingerprint = self.model_fingerprint
+                        batch_results = self.run_models(
+                            [item["canvas"] for item in misses],
+                            imgsz=imgsz,
+                        )
+
+                inferred = {}
+                for item, result in zip(misses, batch_results):
+                    detections = self.unletterbox_detections(result, item)
+                    if fingerprint == self.model_fingerprint:
+                        self.prediction_cache.put(item["image_key"], detections)
+                    self.prefilter.record_audit(item["path"], detections)
+                    inferred[item["path"]] = detections
+
+                for item in prepared:
+                    if item["path"] in inferred:
+                        yield item["path"], inferred[item["path"]]
+                    else:
+                        yield item["path"], item["detections"] or []
+
+        # Wall-clock throughput including decode, cache and prefilter work.
+        with self.lock:
+            self.inference_stats["batch_images"] += len(image_paths)
+            self.inference_stats["batch_seconds"] += time.perf_counter() - started
+
+    def prepare_batch_item(self, image_path: str, imgsz: int) -> dict:
+        """Worker step for predict_many: cache lookup, then decode + letterbox on a miss."""
+        item = {"path": image_path, "image_key": None, "detections": None, "canvas": None}
+
+        try:
+            item["image_key"] = fast_file_digest(image_path)
+        except OSError:
+            return item
+
+        item["detections"] = self.prediction_cache.get(item["image_key"])
+        if item["detections"] is not None:
+            return item
+
+        image, scale = decode_image(image_path, imgsz, imgsz)
+        if image is None:
+            return item
+
+        canvas, ratio, pad = letterbox(image, imgsz)
+        img_h, img_w = image.shape[:2]
+        # Fold the DCT reduction into the ratio so boxes map straight to full resolution.
+        item.update(
+            thumbnail=self.prefilter.thumbnail(image),
+            capture_time=read_capture_time(image_path),
+            canvas=canvas,
+            ratio=ratio / scale,
+            pad=pad,
+            shape=(round(img_h * scale), round(img_w * scale)),
+        )
+        return item
+
+    @staticmethod
+    def unletterbox_detections(result, item: dict) -> list[dict]:
+        """Map boxes predicted on a letterboxed canvas back to original image coordinates."""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        img_h, img_w = item["shape"]
+        pad_x, pad_y = item["pad"]
+        ratio = item["ratio"]
+
+        detections = []
+
+        for class_id, conf, (x1, y1, x2, y2) in zip(
+            boxes.cls.tolist(), boxes.conf.tolist(), boxes.xyxy.tolist()
+        ):
+            x1 = min(max((x1 - pad_x) / ratio, 0.0), img_w)
+            x2 = min(max((x2 - pad_x) / ratio, 0.0), img_w)
+            y1 = min(max((y1 - pad_y) / ratio, 0.0), img_h)
+            y2 = min(max((y2 - pad_y) / ratio, 0.0), img_h)
+
+            # Same dictionary shape as get_detections so callers can mix both paths.
+            detections.append({
+                "class_id": int(class_id),
+                "class_name": result.names[int(class_id)],
+                "confidence": float(conf),
+                "bbox_xyxy": [x1, y1, x2, y2],
+                "bbox_xywhn": [
+                    (x1 + x2) / 2.0 / img_w,
+                    (y1 + y2) / 2.0 / img_h,
+                    (x2 - x1) / img_w,
+                    (y2 - y1) / img_h,
+                ],
+            })
+
+        return detections
+
+    @staticmethod
+    def detections_from_result(result, scale: float = 1.0) -> list[dict]:
+        """Build fresh detection dictionaries from one YOLO result object.
+
+        `scale` maps result pixels back to full resolution when the frame was
+        decoded reduced; normalized boxes are unaffected.
+        """
         boxes = result.boxes
 
         if boxes is None or len(boxes) == 0:
@@ -44,7 +524,7 @@ class ImageLabeler:
                 "class_id": int(class_id),
                 "class_name": result.names[int(class_id)],
                 "confidence": float(conf),
-                "bbox_xyxy": box_xyxy,
+                "bbox_xyxy": [value * scale for value in box_xyxy],
                 "bbox_xywhn": box_xywhn,
             })
 
@@ -0,0 +1,298 @@
+"""INT8 quantisation of the ONNX model, guarded by accuracy on the verified set.
+
+`dynamic` quantises weights only and needs no data. `static` also quantises
+activations, calibrated on letterboxed images from `verified_images/dataset`.
+Either way the INT8 model is compared with the FP32 model on the verified
+images and labels, scoring mAP@0.5 and per-class recall. It is used only when
+the mAP drop and the worst per-class recall drop are inside the configured
+budgets, so a rare class (cougar, bobcat) cannot quietly disappear. The
+report is stored next to the INT8 file and reused until the checkpoint or
+the budgets change.
+"""
+
+from contextlib import nullcontext
+from pathlib import Path
+import json
+
+import numpy as np
+
+from file_hashing import full_file_digest
+from image_decode import decode_image
+from inference_backends import OnnxBackend, letterbox, load_onnx_backend
+
+
+QUANTIZE_MODES = ("dynamic", "static")
+
+
+def verified_samples(limit: int = 500) -> list[tuple[Path, list]]:
+    """(image path, [(class_id, x1, y1, x2, y2) normalised]) for verified images with labels."""
+    dataset = Path.cwd() / "verified_images" / "dataset"
+    images_dir = dataset / "images"
+    labels_dir = dataset / "labels"
+    if not images_dir.exists():
+        return []
+
+    samples = []
+    for image_path in sorted(images_dir.iterdir()):
+        label_path = labels_dir / f"{image_path.stem}.txt"
+        if not label_path.exists():
+            continue
+
+        boxes = []
+        for line in label_path.read_text(encoding="utf-8").splitlines():
+            parts = line.split()
+            if len(parts) != 5:
+                continue
+            class_id = int(parts[0])
+            x_center, y_center, width, height = map(float, parts[1:])
+            boxes.append((
+                class_id,
+                x_center - width / 2.0,
+                y_center - height / 2.0,
+                x_center + width / 2.0,
+                y_center + height / 2.0,
+            ))
+
+        samples.append((image_path, boxes))
+        if len(samples) >= limit:
+            break
+
+    return samples
+
+
+def calibration_batches(image_paths, input_name: str, imgsz: int):
+    """Yield letterboxed verified images as ONNX Runtime calibration inputs."""
+    for image_path in image_paths:
+        frame, _ = decode_image(image_path, imgsz, imgsz)
+        if frame is None:
+            continue
+
+        canvas, _, _ = letterbox(frame, imgsz)
+        tensor = canvas[..., ::-1].transpose(2, 0, 1)[None]
+        yield {input_name: np.ascontiguousarray(tensor, dtype=np.float32) / 255.0}
+
+
+def quantize_onnx(fp32: OnnxBackend, mode: str, calibration_paths, output_path: Path) -> Path:
+    """Write an INT8 copy of the FP32 ONNX model."""
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+
+    if mode == "dynamic":
+        quantize_dynamic(str(fp32.onnx_path), str(output_path), weight_type=QuantType.QInt8)
+        return output_path
+
+    calibration_paths = list(calibration_paths)
+
+    class VerifiedCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.rewind()
+
+        def get_next(self):
+            return next(self.batches, None)
+
+        def rewind(self):
+            self.batches = calibration_batches(calibration_paths, fp32.input_name, fp32.imgsz)
+
+    quantize_static(
+        str(fp32.onnx_path),
+        str(output_path),
+        VerifiedCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    return output_path
+
+
+def box_iou_matrix(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy arrays."""
+    x1 = np.maximum(first[:, None, 0], second[None, :, 0])
+    y1 = np.maximum(first[:, None, 1], second[None, :, 1])
+    x2 = np.minimum(first[:, None, 2], second[None, :, 2])
+    y2 = np.minimum(first[:, None, 3], second[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_first = (first[:, 2] - first[:, 0]) * (first[:, 3] - first[:, 1])
+    area_second = (second[:, 2] - second[:, 0]) * (second[:, 3] - second[:, 1])
+    return inter / (area_first[:, None] + area_second[None, :] - inter + 1e-9)
+
+
+def evaluate(backend, samples, imgsz: int, iou_threshold: float = 0.5, recall_conf: float = 0.25,
+             lock=None) -> dict:
+    """mAP@0.5 and per-class recall (at recall_conf) of a backend on labelled samples."""
+    # class id -> list of (confidence, is true positive); class id -> ground-truth count
+    predictions = {}
+    gt_counts = {}
+
+    for image_path, gt_boxes in samples:
+        frame, _ = decode_image(image_path, imgsz, imgsz)
+        if frame is None:
+            continue
+
+        # Low threshold so the precision/recall curve covers the full range.
+        with lock or nullcontext():
+            result = backend([frame], conf=0.001, verbose=False)[0]
+        boxes = result.boxes
+        pred_cls = np.asarray(boxes.cls.tolist(), dtype=np.int64).reshape(-1)
+        pred_conf = np.asarray(boxes.conf.tolist(), dtype=np.float32).reshape(-1)
+        xywhn = np.asarray(boxes.xywhn.tolist(), dtype=np.float32).reshape(-1, 4)
+        pred_xyxy = np.concatenate([xywhn[:, :2] - xywhn[:, 2:] / 2, xywhn[:, :2] + xywhn[:, 2:] / 2], axis=1)
+
+        gt = np.asarray(gt_boxes, dtype=np.float32).reshape(-1, 5)
+        for class_id in set(pred_cls.tolist()) | set(gt[:, 0].astype(np.int64).tolist()):
+            class_gt = gt[gt[:, 0] == class_id, 1:]
+            gt_counts[class_id] = gt_counts.get(class_id, 0) + len(class_gt)
+
+            class_mask = pred_cls == class_id
+            order = np.argsort(-pred_conf[class_mask])
+            class_conf = pred_conf[class_mask][order]
+            class_xyxy = pred_xyxy[class_mask][order]
+
+            matched = np.zeros(len(class_gt), dtype=bool)
+            ious = box_iou_matrix(class_xyxy, class_gt) if len(class_gt) else None
+            for index, confidence in enumerate(class_conf):
+                hit = False
+                if ious is not None:
+                    candidates = np.where(~matched & (ious[index] >= iou_threshold))[0]
+                    if candidates.size:
+                        matched[candidates[np.argmax(ious[index][candidates])]] = True
+                        hit = True
+                predictions.setdefault(class_id, []).append((float(confidence), hit))
+
+    per_class = {}
+    for class_id, count in gt_counts.items():
+        if count == 0:
+            continue
+
+        rows = sorted(predictions.get(class_id, []), key=lambda row: -row[0])
+        hits = np.array([hit for _, hit in rows], dtype=np.float64)
+        true_positives = np.cumsum(hits)
+        recall_curve = true_positives / count
+        precision_curve = true_positives / np.arange(1, len(hits) + 1)
+
+        # All-point interpolated average precision.
+        recall_points = np.concatenate([[0.0], recall_curve, [1.0]])
+        precision_points = np.concatenate([[1.0], precision_curve, [0.0]])
+        precision_points = np.maximum.accumulate(precision_points[::-1])[::-1]
+        steps = np.where(recall_points[1:] != recall_points[:-1])[0]
+        average_precision = float(np.sum((recall_points[steps + 1] - recall_points[steps]) * precision_points[steps + 1]))
+
+        recall = sum(1 for confidence, hit in rows if hit and confidence >= recall_conf) / count
+        per_class[class_id] = {"ap50": average_precision, "recall": recall, "instances": count}
+
+    mean_ap = float(np.mean([row["ap50"] for row in per_class.values()])) if per_class else 0.0
+    return {"map50": mean_ap, "per_class": per_class}
+
+
+def compare(reference: dict, candidate: dict, names: dict) -> dict:
+    """mAP drop and per-class recall drops of candidate relative to reference."""
+    recall_drops = {}
+    for class_id, row in reference["per_class"].items():
+        other = candidate["per_class"].get(class_id, {"recall": 0.0})
+        recall_drops[names.get(class_id, str(class_id))] = row["recall"] - other["recall"]
+
+    return {
+        "map50_drop": reference["map50"] - candidate["map50"],
+        "recall_drops": recall_drops,
+        "worst_recall_drop": max(recall_drops.values(), default=0.0),
+    }
+
+
+def quantized_paths(model_path, mode: str) -> tuple[Path, Path]:
+    """(INT8 model, accuracy report) stored next to the FP32 checkpoint."""
+    model_path = Path(model_path)
+    int8_path = model_path.with_name(f"{model_path.stem}.int8-{mode}.onnx")
+    return int8_path, int8_path.with_name(int8_path.name + ".json")
+
+
+def cached_quantized_backend(model_path, mode: str, max_map_drop: float, max_recall_drop: float):
+    """(INT8 backend or None, decided) from a stored report, without calibrating anything.
+
+    `decided` is False when the INT8 model still has to be built or checked
+    by `load_quantized_backend`.
+    """
+    if mode not in QUANTIZE_MODES:
+        print(f"Unknown quantisation mode {mode!r}; expected one of {QUANTIZE_MODES}")
+        return None, True
+
+    int8_path, report_path = quantized_paths(model_path, mode)
+    budget = {"max_map_drop": max_map_drop, "max_recall_drop": max_recall_drop}
+
+    try:
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None, False
+
+    if report.get("model_digest") != full_file_digest(model_path) or report.get("budget") != budget:
+        return None, False
+    if not report.get("accepted"):
+        print(f"INT8 {mode} model previously refused: {report.get('reason')}")
+        return None, True
+    if not int8_path.exists():
+        return None, False
+    return OnnxBackend(int8_path), True
+
+
+def load_quantized_backend(fp32_backend, model_path, mode: str, max_map_drop: float,
+                           max_recall_drop: float, max_samples: int = 500, lock=None):
+    """Return an INT8 ONNX backend if it stays inside the accuracy budget, else None.
+
+    Calibration and evaluation take minutes, so run this off the UI thread;
+    `lock` guards calls into fp32_backend while the app keeps using it.
+    """
+    cached, decided = cached_quantized_backend(model_path, mode, max_map_drop, max_recall_drop)
+    if decided:
+        return cached
+
+    model_path = Path(model_path)
+    int8_path, report_path = quantized_paths(model_path, mode)
+    budget = {"max_map_drop": max_map_drop, "max_recall_drop": max_recall_drop}
+    digest = full_file_digest(model_path)
+
+    samples = verified_samples(max_samples)
+    if not samples:
+        print("INT8 mode needs verified images with labels to check accuracy; staying FP32")
+        return None
+
+    # Quantisation needs the FP32 graph even when the active backend is Torch.
+    fp32_onnx = fp32_backend if isinstance(fp32_backend, OnnxBackend) else load_onnx_backend(model_path)
+    if fp32_onnx is None:
+        print("INT8 mode needs an ONNX export of the model; staying FP32")
+        return None
+
+    try:
+        quantize_onnx(fp32_onnx, mode, [path for path, _ in samples], int8_path)
+        int8_backend = OnnxBackend(int8_path)
+    except Exception as e:
+        print(f"INT8 quantisation failed: {e}")
+        return None
+
+    # The active FP32 backend is the reference the INT8 model must match.
+    reference = evaluate(fp32_backend, samples, fp32_onnx.imgsz, lock=lock)
+    candidate = evaluate(int8_backend, samples, fp32_onnx.imgsz)
+    drops = compare(reference, candidate, fp32_backend.names)
+
+    accepted = drops["map50_drop"] <= max_map_drop and drops["worst_recall_drop"] <= max_recall_drop
+    reason = (
+        f"mAP50 {reference['map50']:.3f} -> {candidate['map50']:.3f}, "
+        f"worst per-class recall drop {drops['worst_recall_drop']:.3f} "
+        f"(budget {max_map_drop:.3f} mAP / {max_recall_drop:.3f} recall)"
+    )
+    print(f"INT8 {mode} model {'accepted' if accepted else 'refused'}: {reason}")
+
+    report_path.write_text(json.dumps({
+        "model_digest": digest,
+        "budget": budget,
+        "accepted": accepted,
+        "reason": reason,
+        "samples": len(samples),
+        "fp32_map50": reference["map50"],
+        "int8_map50": candidate["map50"],
+        "recall_drops": drops["recall_drops"],
+    }, indent=2), encoding="utf-8")
+
+    return int8_backend if accepted else None
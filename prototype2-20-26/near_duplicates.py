@@ -0,0 +1,327 @@
+"""Perceptual near-duplicate clustering of the verified dataset.
+
+A burst puts several almost identical frames into the dataset; past the
+first few they add epoch time but little information. Every dataset image
+gets a 64-bit dHash (gradient signs of a 9x8 thumbnail) and pHash (signs of
+the low 8x8 DCT coefficients of a 32x32 thumbnail), computed for whole
+batches at once in NumPy and cached by file size and mtime.
+
+Two images are near-duplicates when both hashes are within a Hamming
+distance threshold. Candidate pairs come from splitting the pHash into
+eight 8-bit bands: two hashes at distance 7 or less must agree on at least
+one band, so only images sharing a band value are ever compared.
+
+Visually close frames can still carry different labels (the animal enters
+the frame, or one frame was left empty), so clusters are split by the set
+of classes in each image's label file before capping. `write_training_list`
+keeps at most `cap` images per split cluster (spread across the burst) in
+`train.txt` and writes a copy of data.yaml that trains on it.
+Validation still uses every image, so metrics stay comparable between runs.
+"""
+
+from pathlib import Path
+import os
+import sqlite3
+
+import cv2
+import numpy as np
+
+
+HASH_SIZE = 8
+PHASH_SIZE = 32
+# Eight 8-bit bands: only hashes this close are guaranteed to share one.
+MAX_PHASH_THRESHOLD = 7
+# Hamming-distance lookup for one byte.
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so a batch transform is two matmuls."""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+DCT = dct_matrix(PHASH_SIZE)
+
+
+def pack_bits(bits: np.ndarray) -> np.ndarray:
+    """(N, 64) booleans -> (N,) uint64."""
+    return np.packbits(bits.astype(np.uint8), axis=1).view(">u8").reshape(-1).astype(np.uint64)
+
+
+def dhash_batch(small: np.ndarray) -> np.ndarray:
+    """(N, 8, 9) grayscale thumbnails -> (N,) dHash."""
+    bits = small[:, :, 1:] > small[:, :, :-1]
+    return pack_bits(bits.reshape(len(small), -1))
+
+
+def phash_batch(thumbs: np.ndarray) -> np.ndarray:
+    """(N, 32, 32) grayscale thumbnails -> (N,) pHash."""
+    coeffs = DCT @ thumbs.astype(np.float32) @ DCT.T
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(thumbs), -1)
+    # Median of the AC terms; the DC term only tracks overall brightness.
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return pack_bits(low > median)
+
+
+def hamming(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Element-wise (broadcasting) Hamming distance between uint64 hashes."""
+    xor = np.bitwise_xor(first, second)
+    flat = np.ascontiguousarray(xor, dtype=np.uint64).reshape(-1)
+    return POPCOUNT[flat.view(np.uint8).reshape(-1, 8)].sum(axis=1).reshape(np.shape(xor))
+
+
+def load_thumbnails(path):
+    """(32x32, 8x9) grayscale thumbnails of an image, or None if unreadable."""
+    # An 1/8 DCT-scaled decode is plenty for a 32x32 thumbnail.
+    gray = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    thumb = cv2.resize(gray, (PHASH_SIZE, PHASH_SIZE), interpolation=cv2.INTER_AREA)
+    small = cv2.resize(gray, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    return thumb, small
+
+
+def to_signed(values: np.ndarray) -> list[int]:
+    # SQLite integers are signed 64-bit.
+    return values.view(np.int64).tolist()
+
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = np.arange(size)
+
+    def find(self, index: int) -> int:
+        root = index
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[index] != root:
+            self.parent[index], index = root, self.parent[index]
+        return root
+
+    def union(self, first: int, second: int) -> None:
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+
+class PerceptualHashIndex:
+    def __init__(self, images_dir: Path, db_path=None, batch_size: int = 256):
+        self.images_dir = Path(images_dir)
+        base_dir = Path.cwd()
+        self.db_path = Path(db_path) if db_path else base_dir / "verified_images" / "perceptual_hashes.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " name TEXT PRIMARY KEY,"
+            " file_size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " dhash INTEGER NOT NULL,"
+            " phash INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+
+    def update(self) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """Hash new or changed dataset images; returns (names, dhashes, phashes) for all of them."""
+        stored = {
+            name: (file_size, mtime_ns, dhash, phash)
+            for name, file_size, mtime_ns, dhash, phash in self.conn.execute(
+                "SELECT name, file_size, mtime_ns, dhash, phash FROM hashes"
+            )
+        }
+
+        names = []
+        dhashes = []
+        phashes = []
+        stale = []
+        with os.scandir(self.images_dir) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                stat = entry.stat()
+                row = stored.pop(entry.name, None)
+                if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+                    names.append(entry.name)
+                    dhashes.append(row[2])
+                    phashes.append(row[3])
+                else:
+                    stale.append((entry.name, stat.st_size, stat.st_mtime_ns))
+
+        for start in range(0, len(stale), self.batch_size):
+            batch = []
+            thumbs = []
+            smalls = []
+            for name, file_size, mtime_ns in stale[start:start + self.batch_size]:
+                loaded = load_thumbnails(self.images_dir / name)
+                if loaded is None:
+                    continue
+                batch.append((name, file_size, mtime_ns))
+                thumbs.append(loaded[0])
+                smalls.append(loaded[1])
+            if not batch:
+                continue
+
+            batch_dhash = to_signed(dhash_batch(np.stack(smalls).astype(np.float32)))
+            batch_phash = to_signed(phash_batch(np.stack(thumbs)))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO hashes (name, file_size, mtime_ns, dhash, phash) VALUES (?, ?, ?, ?, ?)",
+                [row + (d, p) for row, d, p in zip(batch, batch_dhash, batch_phash)],
+            )
+            names.extend(name for name, _, _ in batch)
+            dhashes.extend(batch_dhash)
+            phashes.extend(batch_phash)
+
+        # Rows for images that left the dataset.
+        self.conn.executemany("DELETE FROM hashes WHERE name = ?", [(name,) for name in stored])
+        self.conn.commit()
+
+        return (
+            names,
+            np.array(dhashes, dtype=np.int64).view(np.uint64),
+            np.array(phashes, dtype=np.int64).view(np.uint64),
+        )
+
+    def clusters(self, phash_threshold: int = 6, dhash_threshold: int = 10) -> list[list[str]]:
+        """Groups of near-duplicate dataset images (singletons included), in name order."""
+        if not 0 <= phash_threshold <= MAX_PHASH_THRESHOLD:
+            # Larger distances would silently miss pairs that share no band.
+            raise ValueError(
+                f"phash_threshold must be between 0 and {MAX_PHASH_THRESHOLD}, got {phash_threshold}"
+            )
+        names, dhashes, phashes = self.update()
+        if not names:
+            return []
+
+        union = UnionFind(len(names))
+        bands = phashes.view(np.uint8).reshape(-1, 8)
+        for band in range(bands.shape[1]):
+            values = bands[:, band]
+            order = np.argsort(values, kind="stable")
+            boundaries = np.flatnonzero(np.diff(values[order])) + 1
+            for bucket in np.split(order, boundaries):
+                if len(bucket) < 2:
+                    continue
+                bucket_phash = phashes[bucket]
+                bucket_dhash = dhashes[bucket]
+                # Pairwise distances a block of rows at a time, so one huge bucket
+                # (e.g. many night frames) cannot allocate an N x N matrix.
+                for start in range(0, len(bucket), self.batch_size):
+                    rows = slice(start, start + self.batch_size)
+                    close = (
+                        (hamming(bucket_phash[rows, None], bucket_phash[None, :]) <= phash_threshold)
+                        & (hamming(bucket_dhash[rows, None], bucket_dhash[None, :]) <= dhash_threshold)
+                    )
+                    for first, second in zip(*np.nonzero(close)):
+                        if start + first < second:
+                            union.union(int(bucket[start + first]), int(bucket[second]))
+
+        groups = {}
+        for index, name in enumerate(names):
+            groups.setdefault(union.find(index), []).append(name)
+        # File numbers follow capture order, so sorted names run through each burst.
+        return [sorted(group) for group in groups.values()]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def spread(names: list[str], cap: int) -> list[str]:
+    """At most cap names, evenly spaced so the kept frames span the whole burst."""
+    if len(names) <= cap:
+        return names
+    picks = np.unique(np.linspace(0, len(names) - 1, cap).round().astype(int))
+    return [names[index] for index in picks]
+
+
+def label_classes(labels_dir: Path, name: str) -> frozenset:
+    """Class ids in an image's YOLO label file; empty for a background frame."""
+    label_path = labels_dir / f"{Path(name).stem}.txt"
+    try:
+        lines = label_path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return frozenset()
+    return frozenset(line.split()[0] for line in lines if line.strip())
+
+
+def split_by_labels(clusters: list[list[str]], labels_dir: Path) -> list[list[str]]:
+    """Split each cluster into groups whose images are labelled with the same classes."""
+    split = []
+    for cluster in clusters:
+        if len(cluster) == 1:
+            split.append(cluster)
+            continue
+        groups = {}
+        for name in cluster:
+            groups.setdefault(label_classes(labels_dir, name), []).append(name)
+        split.extend(groups.values())
+    return split
+
+
+def dataset_dir_from_yaml(data_yaml: Path) -> Path:
+    for line in Path(data_yaml).read_text(encoding="utf-8").splitlines():
+        if line.startswith("path:"):
+            path = Path(line.split(":", 1)[1].strip())
+            return path if path.is_absolute() else Path.cwd() / path
+    return Path.cwd() / "verified_images" / "dataset"
+
+
+def write_training_list(data_yaml, cap: int, phash_threshold: int = 6, dhash_threshold: int = 10):
+    """Write train.txt with at most cap images per near-duplicate cluster.
+
+    Returns (path of the derived data yaml, report dict).
+    """
+    data_yaml = Path(data_yaml)
+    dataset_dir = dataset_dir_from_yaml(data_yaml)
+    images_dir = dataset_dir / "images"
+
+    index = PerceptualHashIndex(images_dir)
+    try:
+        clusters = index.clusters(phash_threshold, dhash_threshold)
+    finally:
+        index.close()
+    # Capping must not drop the only frames showing a class (or the only empty ones).
+    clusters = split_by_labels(clusters, dataset_dir / "labels")
+
+    kept = [name for cluster in clusters for name in spread(cluster, cap)]
+    kept.sort()
+
+    train_list = dataset_dir / "train.txt"
+    tmp = train_list.with_suffix(".tmp")
+    tmp.write_text("".join(f"{images_dir / name}\n" for name in kept), encoding="utf-8")
+    tmp.replace(train_list)
+
+    # Same yaml with an absolute dataset path and the capped train list.
+    lines = []
+    for line in data_yaml.read_text(encoding="utf-8").splitlines():
+        if line.startswith("path:"):
+            line = f"path: {dataset_dir}"
+        elif line.startswith("train:"):
+            line = f"train: {train_list.name}"
+        lines.append(line)
+    if not any(line.startswith("path:") for line in lines):
+        lines.insert(0, f"path: {dataset_dir}")
+
+    derived_yaml = dataset_dir / "data.train.yaml"
+    derived_yaml.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    total = sum(len(cluster) for cluster in clusters)
+    duplicate_clusters = [cluster for cluster in clusters if len(cluster) > 1]
+    report = {
+        "images": total,
+        "kept": len(kept),
+        "suppressed": total - len(kept),
+        "clusters": len(duplicate_clusters),
+        "largest_cluster": max((len(cluster) for cluster in clusters), default=0),
+        "cap": cap,
+        # Epoch time scales with the number of training images.
+        "epoch_fraction_saved": (total - len(kept)) / total if total else 0.0,
+    }
+    return derived_yaml, report
@@ -0,0 +1,109 @@
+"""Persistent store of model detections keyed by image content and model weights.
+
+Rows live in a small SQLite file beside the verified dataset so reopening a
+folder that was already reviewed costs one indexed lookup per image instead of
+a YOLO forward pass.
+"""
+
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+
+
+class PredictionCache:
+    def __init__(self, db_path=None, max_entries: int = 250_000):
+        # Keep the cache with other app-managed data (same base as TrainingManager).
+        base_dir = Path.cwd()
+        self.db_path = Path(db_path) if db_path else base_dir / "verified_images" / "prediction_cache.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.max_entries = max_entries
+        self.model_key = None
+        self.puts_since_evict = 0
+
+        # Prefetch workers share this connection, so serialize access ourselves.
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " image_key TEXT PRIMARY KEY,"
+            " model_key TEXT NOT NULL,"
+            " detections TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions(last_used)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.commit()
+
+    def set_model(self, model_key: str) -> None:
+        """Bind the cache to one set of weights, dropping rows from any other model."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'model_key'").fetchone()
+            if row is None or row[0] != model_key:
+                # New weights make every stored detection stale.
+                self.conn.execute("DELETE FROM predictions")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('model_key', ?)",
+                    (model_key,),
+                )
+                self.conn.commit()
+            self.model_key = model_key
+
+    def get(self, image_key: str) -> list[dict] | None:
+        """Return stored detections for an image, or None on a miss."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT detections FROM predictions WHERE image_key = ? AND model_key = ?",
+                (image_key, self.model_key),
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Recency drives eviction; NORMAL sync keeps this touch cheap in WAL mode.
+            self.conn.execute(
+                "UPDATE predictions SET last_used = ? WHERE image_key = ?",
+                (time.time(), image_key),
+            )
+            self.conn.commit()
+
+        return json.loads(row[0])
+
+    def put(self, image_key: str, detections: list[dict]) -> None:
+        """Store detections for an image under the current model."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO predictions (image_key, model_key, detections, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                (image_key, self.model_key, json.dumps(detections), time.time()),
+            )
+            self.conn.commit()
+
+            # Counting rows is a table scan, so only check the bound periodically.
+            self.puts_since_evict += 1
+            if self.puts_since_evict >= 500:
+                self.puts_since_evict = 0
+                self.evict_locked()
+
+    def evict_locked(self) -> None:
+        """Trim least recently used rows until the cache is back under its bound."""
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+
+        # Drop a little extra so eviction does not run on every subsequent put.
+        excess += self.max_entries // 10
+        self.conn.execute(
+            "DELETE FROM predictions WHERE image_key IN"
+            " (SELECT image_key FROM predictions ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,73 @@
+"""Copy-free conversion of OpenCV frames into Qt images for display.
+
+OpenCV decodes to BGR, which Qt reads directly as `Format_BGR888`, so frames are
+wrapped in place instead of going through cvtColor -> PIL -> QImage copies.
+"""
+
+import cv2
+import numpy as np
+from PySide6.QtGui import QImage, QPixmap
+
+
+def frame_to_qimage(frame: np.ndarray) -> QImage:
+    """Wrap a BGR uint8 frame as a QImage that shares the numpy buffer.
+
+    The QImage does not own the memory: the caller must keep `frame` alive
+    for as long as the QImage is used (QPixmap.fromImage copies, so converting
+    straight to a pixmap is always safe). A non-contiguous frame (e.g. a crop)
+    is the exception: it is returned as a QImage that owns a copy.
+    """
+    if not frame.flags["C_CONTIGUOUS"]:
+        # The contiguous buffer is local to this call, so Qt must copy it before it goes.
+        contiguous = np.ascontiguousarray(frame)
+        height, width = contiguous.shape[:2]
+        return QImage(
+            contiguous.data, width, height, contiguous.strides[0], QImage.Format.Format_BGR888
+        ).copy()
+
+    height, width = frame.shape[:2]
+    return QImage(frame.data, width, height, frame.strides[0], QImage.Format.Format_BGR888)
+
+
+def frame_to_pixmap(frame: np.ndarray) -> QPixmap:
+    """Upload a BGR frame to a QPixmap with a single copy (UI thread only)."""
+    return QPixmap.fromImage(frame_to_qimage(frame))
+
+
+def fit_size(width: int, height: int, max_width: int, max_height: int) -> tuple[int, int]:
+    """Largest size with the frame's aspect ratio inside max_width x max_height."""
+    ratio = min(max_width / width, max_height / height)
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+class FrameScaler:
+    """Resize frames to display size, reusing one output buffer between renders."""
+
+    def __init__(self, max_width: int = 1000, max_height: int = 700):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.buffer = None
+
+    def scale(self, frame: np.ndarray, reuse: bool = True) -> np.ndarray:
+        """Return frame resized to fit the display box.
+
+        With reuse=True the result lives in a shared buffer that the next call
+        overwrites, so it must be uploaded (e.g. to a QPixmap) before then.
+        Pool threads should pass reuse=False and own their result.
+        """
+        img_h, img_w = frame.shape[:2]
+        out_w, out_h = fit_size(img_w, img_h, self.max_width, self.max_height)
+
+        # INTER_AREA is the high-quality choice for the heavy downscales we do here.
+        interpolation = cv2.INTER_AREA if out_w < img_w else cv2.INTER_LINEAR
+
+        if not reuse:
+            return cv2.resize(frame, (out_w, out_h), interpolation=interpolation)
+
+        # Camera frames share one size, so the buffer is reused across images.
+        shape = (out_h, out_w) + frame.shape[2:]
+        if self.buffer is None or self.buffer.shape != shape or self.buffer.dtype != frame.dtype:
+            self.buffer = np.empty(shape, dtype=frame.dtype)
+
+        cv2.resize(frame, (out_w, out_h), dst=self.buffer, interpolation=interpolation)
+        return self.buffer
@@ -0,0 +1,111 @@
+"""Byte-budgeted LRU cache for the image viewer's render pipeline.
+
+Three layers share one memory budget:
+- `frame`: decoded BGR frame straight from disk
+- `pixmap`: display-sized base image with nothing drawn on it
+- `overlay`: base pixmap with the detection boxes painted on
+
+Hit/miss counters are kept per layer so the budget can be sized for the
+field laptops.
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as np
+from PySide6.QtGui import QImage, QPixmap
+
+
+LAYERS = ("frame", "overlay", "pixmap")
+
+
+def estimate_bytes(value) -> int:
+    """Approximate memory held by a cached image value."""
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, QImage):
+        return int(value.sizeInBytes())
+    if isinstance(value, QPixmap):
+        return value.width() * value.height() * max(1, value.depth()) // 8
+    return 0
+
+
+class RenderCache:
+    def __init__(self, max_bytes: int = 768 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # (layer, key) -> (value, nbytes), oldest first.
+        self.entries = OrderedDict()
+        self.hits = {layer: 0 for layer in LAYERS}
+        self.misses = {layer: 0 for layer in LAYERS}
+        # Prefetch workers fill frame/overlay layers from pool threads.
+        self.lock = threading.Lock()
+
+    def get(self, layer: str, key):
+        """Return a cached value and mark it recently used, or None on a miss."""
+        with self.lock:
+            entry = self.entries.get((layer, key))
+            if entry is None:
+                self.misses[layer] += 1
+                return None
+
+            self.entries.move_to_end((layer, key))
+            self.hits[layer] += 1
+            return entry[0]
+
+    def put(self, layer: str, key, value) -> None:
+        """Store a value, evicting least recently used entries over the budget."""
+        nbytes = estimate_bytes(value)
+        if nbytes > self.max_bytes:
+            # A single oversized frame would flush everything else; skip it.
+            return
+
+        with self.lock:
+            old = self.entries.pop((layer, key), None)
+            if old is not None:
+                self.total_bytes -= old[1]
+
+            self.entries[(layer, key)] = (value, nbytes)
+            self.total_bytes += nbytes
+
+            while self.total_bytes > self.max_bytes and self.entries:
+                _, (_, evicted_bytes) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+
+    def discard(self, path: str, layers=LAYERS) -> None:
+        """Drop cached entries for one image path (keys are the path or start with it)."""
+        with self.lock:
+            for entry_key in list(self.entries):
+                layer, key = entry_key
+                if layer not in layers:
+                    continue
+                if key == path or (isinstance(key, tuple) and key and key[0] == path):
+                    self.total_bytes -= self.entries.pop(entry_key)[1]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        """Snapshot of usage and per-layer hit/miss counters."""
+        with self.lock:
+            layer_bytes = {layer: 0 for layer in LAYERS}
+            layer_entries = {layer: 0 for layer in LAYERS}
+            for (layer, _), (_, nbytes) in self.entries.items():
+                layer_bytes[layer] += nbytes
+                layer_entries[layer] += 1
+
+            return {
+                "max_bytes": self.max_bytes,
+                "total_bytes": self.total_bytes,
+                "layers": {
+                    layer: {
+                        "entries": layer_entries[layer],
+                        "bytes": layer_bytes[layer],
+                        "hits": self.hits[layer],
+                        "misses": self.misses[layer],
+                    }
+                    for layer in LAYERS
+                },
+            }
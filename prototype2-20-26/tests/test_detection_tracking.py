@@ -0,0 +1,63 @@
+import numpy as np
+
+from detection_tracking import propagate_detections
+
+
+def background(seed=0):
+    rng = np.random.default_rng(seed)
+    # Textured scene so template matching has something to lock onto.
+    frame = rng.integers(90, 160, size=(480, 640, 3), dtype=np.uint8)
+    return np.ascontiguousarray(np.repeat(np.repeat(frame[::8, ::8], 8, axis=0), 8, axis=1))
+
+
+def with_blob(frame, x, y, width, height):
+    """A dark, still textured patch standing in for an animal."""
+    frame = frame.copy()
+    frame[y:y + height, x:x + width] //= 4
+    return frame
+
+
+def detection(x1, y1, x2, y2, img_w=640, img_h=480):
+    return {
+        "class_id": 0,
+        "class_name": "deer",
+        "confidence": 0.9,
+        "bbox_xyxy": [x1, y1, x2, y2],
+        "bbox_xywhn": [
+            (x1 + x2) / 2.0 / img_w,
+            (y1 + y2) / 2.0 / img_h,
+            (x2 - x1) / img_w,
+            (y2 - y1) / img_h,
+        ],
+    }
+
+
+def test_empty_keyframe_is_never_propagated():
+    scene = background()
+    detections, _ = propagate_detections(scene, [], scene)
+    assert detections is None
+
+
+def test_animal_appearing_mid_burst_is_reinferred():
+    keyframe = background()
+    for width, height in ((60, 50), (80, 70)):
+        sibling = with_blob(keyframe, 400, 300, width, height)
+        detections, _ = propagate_detections(keyframe, [], sibling)
+        assert detections is None
+
+
+def test_small_animal_next_to_tracked_one_is_reinferred():
+    keyframe = with_blob(background(), 100, 100, 80, 70)
+    tracked = [detection(100, 100, 180, 170)]
+    # Same animal, plus a second small one far from it: under 2% of the frame.
+    sibling = with_blob(keyframe, 450, 320, 60, 50)
+    detections, _ = propagate_detections(keyframe, tracked, sibling)
+    assert detections is None
+
+
+def test_unchanged_burst_frame_is_propagated():
+    keyframe = with_blob(background(), 100, 100, 80, 70)
+    tracked = [detection(100, 100, 180, 170)]
+    detections, confidence = propagate_detections(keyframe, tracked, keyframe.copy())
+    assert detections is not None and len(detections) == 1
+    assert confidence > 0.9
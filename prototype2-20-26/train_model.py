@@ -6,7 +6,7 @@ which launches `training_subprocess.py` and exposes a polling snapshot API.
 
 import os
 
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, QTimer, Signal
 from PySide6.QtGui import QCloseEvent, QGuiApplication
 
 from PySide6.QtWidgets import (
@@ -20,6 +20,35 @@ import qtawesome as qta
 from training_config import TrainingConfig
 from training_session import get_training_session
 from ui_dialogs import confirm_action
+from verified_images_manager import TrainingManager
+
+
+class DedupSignals(QObject):
+    # report dict, or None when the job failed
+    finished = Signal(object)
+
+
+class DedupTask(QRunnable):
+    """Run the verified dataset dedup job off the UI thread (it hashes every image)."""
+
+    def __init__(self, drive):
+        super().__init__()
+        self.drive = drive
+        self.signals = DedupSignals()
+
+    def run(self):
+        manager = None
+        try:
+            manager = TrainingManager(self.drive)
+            report = manager.dedupe_dataset()
+        except Exception as e:
+            print(f"Dataset dedup failed: {e}")
+            report = None
+        finally:
+            # Its writer threads would otherwise outlive the job.
+            if manager is not None:
+                manager.close()
+        self.signals.finished.emit(report)
 
 
 class TrainModel(QMainWindow):
@@ -118,8 +147,14 @@ class TrainModel(QMainWindow):
         self.stop_btn.clicked.connect(self.abort_training)
         self.stop_btn.setEnabled(False)
 
+        # Remove byte-identical images from the dataset before spending epochs on them.
+        self.dedup_btn = QPushButton("Remove Duplicate Images")
+        self.dedup_btn.clicked.connect(self.dedupe_dataset)
+        self.dedup_task = None
+
         layout.addWidget(self.train_btn)
         layout.addWidget(self.stop_btn)
+        layout.addWidget(self.dedup_btn)
 
         self.refresh_timer = QTimer(self)
         # UI polls snapshot every 500 ms to mirror subprocess state in near real time.
@@ -205,6 +240,37 @@ class TrainModel(QMainWindow):
         self.debug_label.setText("Debug: waiting for first completed epoch...")
         self.refresh_session_ui()
 
+    def dedupe_dataset(self):
+        """Start the dataset dedup job in the background."""
+        if not confirm_action(
+            self,
+            "Remove Duplicates",
+            "Remove byte-identical duplicate images from the verified dataset?",
+        ):
+            return
+
+        self.dedup_task = DedupTask(self.drive)
+        self.dedup_task.signals.finished.connect(self.on_dedup_finished)
+        self.dedup_btn.setEnabled(False)
+        self.train_btn.setEnabled(False)
+        self.progress_label.setText("Removing duplicate images...")
+        QThreadPool.globalInstance().start(self.dedup_task)
+
+    def on_dedup_finished(self, report):
+        self.dedup_task = None
+        self.refresh_session_ui()
+        if report is None:
+            QMessageBox.warning(self, "Remove Duplicates", "Duplicate removal failed. See the console for details.")
+            return
+
+        QMessageBox.information(
+            self,
+            "Remove Duplicates",
+            f"Scanned {report['scanned']} images.\n"
+            f"Removed {report['duplicates_removed']} duplicates "
+            f"({report['bytes_freed'] / (1024 * 1024):.1f} MB freed).",
+        )
+
     # Abort the training if requested by the user
     # This calls the session.request_stop() function which tries to stop the training session
     # using a function in training_session.py
@@ -293,8 +359,11 @@ class TrainModel(QMainWindow):
             snapshot["debug_lines"][-1] if snapshot["debug_lines"] else "Debug: idle"
         )
 
-        self.train_btn.setEnabled(not snapshot["running"])
+        # Dedup deletes dataset files, so it never overlaps a training run.
+        dedup_running = self.dedup_task is not None
+        self.train_btn.setEnabled(not snapshot["running"] and not dedup_running)
         self.stop_btn.setEnabled(snapshot["running"])
+        self.dedup_btn.setEnabled(not snapshot["running"] and not dedup_running)
 
         current_counter = int(snapshot["completion_counter"])
         if current_counter != self.last_completion_counter:
@@ -29,3 +29,10 @@ class TrainingConfig:
     project: str = "Models"
     # Preferred run folder base name (auto-incremented if it exists).
     name: str = "experiment1"
+    # Most training images kept per cluster of near-identical burst frames (with the
+    # same labelled classes); None trains on all. Opt-in, e.g. 3.
+    near_duplicate_cap: int | None = None
+    # Hamming-distance limits (of 64 bits) for two images to count as near-duplicates;
+    # the pHash limit is at most 7 (the band lookup cannot find pairs further apart).
+    near_duplicate_phash_threshold: int = 6
+    near_duplicate_dhash_threshold: int = 10
@@ -20,6 +20,7 @@ from pathlib import Path
 from ultralytics import YOLO
 
 from app_paths import app_base_dir
+from near_duplicates import write_training_list
 from training_config import TrainingConfig
 
 
@@ -405,6 +406,28 @@ def main() -> int:
                     f"Could not find data.yaml in {Path(args.drive)} or {base_dir}"
                 )
 
+        near_duplicates = None
+        if config.near_duplicate_cap:
+            emit("progress", progress=0, status="Grouping near-duplicate burst frames...")
+            capped_path, near_duplicates = write_training_list(
+                data_path,
+                config.near_duplicate_cap,
+                config.near_duplicate_phash_threshold,
+                config.near_duplicate_dhash_threshold,
+            )
+            # An empty list means no readable dataset images; let YOLO report that on the original yaml.
+            if near_duplicates["kept"]:
+                data_path = capped_path
+            emit(
+                "log",
+                text=(
+                    f"Near-duplicate cap {near_duplicates['cap']}: training on {near_duplicates['kept']} "
+                    f"of {near_duplicates['images']} images ({near_duplicates['suppressed']} suppressed "
+                    f"in {near_duplicates['clusters']} clusters, "
+                    f"~{near_duplicates['epoch_fraction_saved'] * 100:.0f}% less epoch time)"
+                ),
+            )
+
         project_path = Path(config.project)
         if not project_path.is_absolute():
             project_path = (base_dir / project_path).resolve()
@@ -434,12 +457,21 @@ def main() -> int:
                 if stop_requested(stop_file):
                     trainer.stop = True
 
+            epoch_started = {}
+
             def on_train_epoch_start(trainer):
+                epoch_started[int(getattr(trainer, "epoch", 0))] = time.time()
                 progress_tracker.on_epoch_start(trainer)
                 if stop_requested(stop_file):
                     trainer.stop = True
 
             def on_train_epoch_end(trainer):
+                epoch = int(getattr(trainer, "epoch", 0))
+                if near_duplicates and near_duplicates["kept"] and epoch == min(epoch_started, default=-1):
+                    # Epoch time scales with image count; price the suppressed frames at this epoch's rate.
+                    seconds = time.time() - epoch_started[epoch]
+                    saved = seconds * near_duplicates["suppressed"] / near_duplicates["kept"]
+                    emit("debug", text=f"Debug: near-duplicate cap saves ~{saved:.0f}s per epoch ({seconds:.0f}s actual)")
                 progress_tracker.on_epoch_end(trainer)
                 if stop_requested(stop_file):
                     trainer.stop = True
@@ -1,15 +1,24 @@
 """Utilities for maintaining the verified training dataset on disk.
 
 This module maps original camera image paths to deterministic dataset filenames
-and keeps paired YOLO label files in sync.
+and keeps paired YOLO label files in sync. Every change goes through the
+dataset journal first, so a crash never leaves an image without its label.
 """
 
 from pathlib import Path
-import shutil
+import json
+import os
 import re
+import threading
+
+from content_index import ContentIndex
+from dataset_journal import DatasetJournal
+from dataset_storage import DatasetStorage
+from dataset_writer import DatasetWriter
+from file_hashing import fast_file_digest, full_file_digest
 
 class TrainingManager:
-    def __init__(self, root_drive):
+    def __init__(self, root_drive, storage_mode="auto"):
         self.root_drive = Path(root_drive)
 
         # Centralized training set location beside this module.
@@ -24,8 +33,46 @@ class TrainingManager:
         self.images_dir.mkdir(parents=True, exist_ok=True)
         self.labels_dir.mkdir(parents=True, exist_ok=True)
 
+        # Append-only record of verified filenames so startup does not re-glob the
+        # dataset. Each line carries the images dir mtime seen after the change.
+        self.manifest_path = base_dir / "verified_images" / "verified_manifest.jsonl"
+
+        # Bidirectional source path <-> dataset filename index. Files in one folder
+        # share an ancestry prefix, so paths are resolved once per directory.
+        self.source_names = {}
+        self.name_sources = {}
+        self.dir_prefixes = {}
+
+        # Dataset images are reflinks or hardlinks to the source where the filesystem allows.
+        self.storage = DatasetStorage(self.images_dir, storage_mode)
+        self.storage_mode = self.storage.detect(self.root_drive)
+        print(f"Dataset storage mode for {self.root_drive}: {self.storage_mode}")
+
+        # Byte-identical images share one dataset entry; other names become aliases.
+        self.content_index = ContentIndex(self.images_dir, in_flight=self.in_flight_source)
+
+        # Write-ahead log of verify/unverify/relabel; half-applied ones are redone here.
+        self.journal = DatasetJournal(base_dir / "verified_images" / "dataset_journal.jsonl")
+        # Writer threads append to the manifest concurrently.
+        self.manifest_lock = threading.Lock()
+        # Label lines not yet on disk, served to readers in the meantime.
+        self.pending_labels = {}
+        # name -> queued unverify record, so a failed one can restore the verified state.
+        self.pending_unverifies = {}
+        # Recovery may touch the verified set; the manifest load below replaces it.
         self.verified_cache = set()
-        self.refresh_verified_cache()
+        self.recover_journal()
+
+        self.load_verified_cache()
+        # Aliases have no files of their own; they are verified while their entry is.
+        self.verified_cache.update(self.content_index.aliases_of(self.verified_cache))
+
+        # Copies and label writes run behind the UI; the verified set is updated
+        # optimistically until they are written.
+        self.writer = DatasetWriter()
+        # Called from writer threads: on_reused(name, entry) when a verify found its
+        # bytes already stored under entry and kept that entry's image and label.
+        self.on_reused = None
 
     # ============================
     # UTILITIES
@@ -39,9 +86,74 @@ class TrainingManager:
         """Heuristic used to stop ancestor traversal at camera folder boundary."""
         return "-" in name and len(name) <= 5
     
+    def images_dir_mtime(self) -> int:
+        return os.stat(self.images_dir).st_mtime_ns
+
+    def load_verified_cache(self):
+        """Load the verified set from the manifest, rescanning only if the dataset changed."""
+        names = set()
+        recorded_mtime = None
+        events = 0
+
+        try:
+            with self.manifest_path.open("r", encoding="utf-8") as f:
+                for raw in f:
+                    try:
+                        event = json.loads(raw)
+                    except ValueError:
+                        # A torn final line from a crash; the mtime check below catches it.
+                        continue
+
+                    op = event.get("op")
+                    if op == "snapshot":
+                        names = set(event.get("names", []))
+                    elif op == "add":
+                        names.add(event.get("name"))
+                    elif op == "remove":
+                        names.discard(event.get("name"))
+                    recorded_mtime = event.get("dir_mtime_ns", recorded_mtime)
+                    events += 1
+        except FileNotFoundError:
+            pass
+
+        # Anything touched the images dir outside this app (copy, delete, sync tool)?
+        if recorded_mtime is None or recorded_mtime != self.images_dir_mtime():
+            self.refresh_verified_cache()
+            return
+
+        self.verified_cache = names
+
+        # Keep replay cheap by compacting once the log outgrows the set it describes.
+        if events > 2 * len(names) + 100:
+            self.write_manifest_snapshot()
+
     def refresh_verified_cache(self):
-        """Rebuild fast lookup set of all dataset image filenames."""
-        self.verified_cache = {p.name for p in self.images_dir.glob("*") if p.is_file()}
+        """Rebuild fast lookup set of all dataset image filenames (reconcile on demand)."""
+        with os.scandir(self.images_dir) as entries:
+            # Dot-files are in-flight temporaries, not dataset images.
+            self.verified_cache = {
+                entry.name for entry in entries
+                if entry.is_file() and not entry.name.startswith(".")
+            }
+        self.write_manifest_snapshot()
+
+    def write_manifest_snapshot(self):
+        """Replace the manifest with a single snapshot of the current verified set."""
+        snapshot = {
+            "op": "snapshot",
+            "names": sorted(self.verified_cache),
+            "dir_mtime_ns": self.images_dir_mtime(),
+        }
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot) + "\n", encoding="utf-8")
+        tmp.replace(self.manifest_path)
+
+    def record_manifest_event(self, op: str, name: str):
+        """Append one add/remove to the manifest instead of rescanning the dataset."""
+        with self.manifest_lock:
+            event = {"op": op, "name": name, "dir_mtime_ns": self.images_dir_mtime()}
+            with self.manifest_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
 
     # ============================
     # CORE PATH PARSING
@@ -49,11 +161,31 @@ class TrainingManager:
 
     def build_full_path_name(self, source_path: Path) -> str:
         """Build deterministic dataset filename from source ancestry + stem."""
-        source_path = Path(source_path).resolve()
+        key = str(source_path)
+        name = self.source_names.get(key)
+        if name is not None:
+            return name
+
+        source_path = Path(source_path)
+        parts = self.directory_prefix(str(source_path.parent))
+
+        name = "_".join(parts + [source_path.stem]) + source_path.suffix
+
+        self.source_names[key] = name
+        self.name_sources[name] = key
+        return name
+
+    def directory_prefix(self, directory: str) -> list[str]:
+        """Sanitized ancestry parts for every file in a directory (memoized per directory)."""
+        parts = self.dir_prefixes.get(directory)
+        if parts is not None:
+            return parts
+
+        resolved = Path(directory).resolve()
 
         parts = []
 
-        for ancestor in source_path.parents:
+        for ancestor in [resolved, *resolved.parents]:
             parts.append(ancestor.name)
 
             # Once camera folder is reached, do not include higher-level folders.
@@ -64,7 +196,33 @@ class TrainingManager:
 
         parts = [self.sanitize(p) for p in parts if p]
 
-        return "_".join(parts + [source_path.stem]) + source_path.suffix
+        self.dir_prefixes[directory] = parts
+        return parts
+
+    def index_sources(self, source_paths):
+        """Map a whole folder scan to dataset filenames up front (one resolve per directory)."""
+        for source_path in source_paths:
+            self.build_full_path_name(source_path)
+
+    def in_flight_source(self, dataset_name: str):
+        """Source path of a dataset entry whose verify is still queued, else None."""
+        if dataset_name not in self.pending_labels:
+            return None
+        return self.name_sources.get(dataset_name)
+
+    def source_for_name(self, dataset_name: str):
+        """Reverse lookup: original source path for an indexed dataset filename."""
+        return self.name_sources.get(dataset_name)
+
+    def verified_flags(self, source_paths) -> list[bool]:
+        """Verified state for many sources at once, e.g. one filter pass over a folder."""
+        names = self.source_names
+        verified = self.verified_cache
+        build = self.build_full_path_name
+        return [
+            (names.get(path) or build(path)) in verified
+            for path in map(str, source_paths)
+        ]
 
     # ============================
     # PUBLIC API
@@ -79,29 +237,313 @@ class TrainingManager:
         return self.images_dir / new_filename
 
     def verify_image(self, source_path, label_lines=None):
-        """Copy source image into dataset and write/update its YOLO label file."""
-        source_path = Path(source_path)
+        """Queue copying source image into dataset and writing its YOLO label file.
 
-        destination = self.generate_train_name(source_path)
+        The image counts as verified immediately; the files are written by the
+        background writer (call flush() to wait for them).
+        """
+        record, destination, label_path = self.stage_verify(source_path, label_lines)
+        self.submit_transaction(record)
+        return destination, label_path
 
-        shutil.copy2(source_path, destination)
+    def verify_many(self, items):
+        """Verify many (source_path, label_lines) pairs at once.
 
-        self.verified_cache.add(destination.name)
+        All intents are journaled with a single fsync before the copies are
+        queued, so bulk verification costs one sync instead of one per image.
+        """
+        staged = [self.stage_verify(source_path, label_lines) for source_path, label_lines in items]
+
+        for record in self.journal.log_many([record for record, _, _ in staged]):
+            self.submit_transaction(record, logged=True)
+
+        return [(destination, label_path) for _, destination, label_path in staged]
 
+    def relabel_image(self, source_path, label_lines):
+        """Queue replacing the label file of an already verified image."""
+        name = self.content_index.resolve(self.build_full_path_name(Path(source_path)))
+        lines = list(label_lines or [])
+        self.pending_labels[name] = lines
+        self.submit_transaction({"op": "relabel", "name": name, "lines": lines})
+
+    def stage_verify(self, source_path, label_lines):
+        """Mark a source verified in memory and build its journal record."""
+        source_path = Path(source_path)
+
+        destination = self.generate_train_name(source_path)
         label_path = self.labels_dir / f"{destination.stem}.txt"
+        lines = list(label_lines or [])
 
-        lines = label_lines or []
+        self.verified_cache.add(destination.name)
+        self.pending_labels[destination.name] = lines
+        self.pending_unverifies.pop(destination.name, None)
+
+        record = {"op": "verify", "name": destination.name, "source": str(source_path), "lines": lines}
+        return record, destination, label_path
+
+    def submit_transaction(self, record, logged=False):
+        """Queue one journaled dataset change on the background writer."""
+        name = record["name"]
+        state = {"record": record if logged else None}
+
+        def run():
+            # Log once; retries after a failed copy reuse the same intent.
+            if state["record"] is None:
+                state["record"] = self.journal.log(record)
+            txn = state["record"]["txn"]
+            self.journal.mark_applied(txn, self.apply_transaction(state["record"]))
+            if self.pending_unverifies.get(name) is record:
+                self.pending_unverifies.pop(name, None)
+
+        def failed(error):
+            if state["record"] is not None:
+                self.journal.abort(state["record"]["txn"])
+            # Roll back the optimistic state unless a newer operation replaced it.
+            lines = record.get("lines")
+            if lines is not None and self.pending_labels.get(name) is lines:
+                self.pending_labels.pop(name, None)
+                if record["op"] == "verify":
+                    self.verified_cache.discard(name)
+            if self.pending_unverifies.get(name) is record:
+                # The files are still in the dataset, so the image is still verified.
+                self.pending_unverifies.pop(name, None)
+                self.verified_cache.add(name)
+
+        self.writer.submit(name, run, failed)
+
+    def apply_transaction(self, record, recovering=False) -> list[Path]:
+        """Writer thread: apply one journal record; returns the files it touched.
+
+        Every operation is idempotent so recovery can redo it after a crash.
+        """
+        op = record["op"]
+        name = record["name"]
+        image_path = self.images_dir / name
+        label_path = self.labels_dir / f"{Path(name).stem}.txt"
+
+        if op == "unverify":
+            if self.content_index.resolve(name) != name:
+                # An alias: the shared entry stays for the other source.
+                self.content_index.remove_alias(name)
+                return []
+
+            # Only the dataset name is removed; a hardlinked source keeps its data.
+            # Image first: a leftover label without an image is ignored by training.
+            aliases = self.content_index.aliases_of([name])
+            if aliases:
+                return self.promote_alias(name, min(aliases))
+
+            image_path.unlink(missing_ok=True)
+            label_path.unlink(missing_ok=True)
+            self.content_index.remove_entry(name)
+            self.record_manifest_event("remove", name)
+            return [image_path, label_path]
+
+        if op == "alias":
+            # Dedup job: name's bytes are already stored under entry.
+            entry = record["entry"]
+            if not (self.images_dir / entry).exists():
+                return []
+            # Aliases that pointed at name follow it to entry.
+            for alias in [name, *self.content_index.remove_entry(name)]:
+                self.content_index.add_alias(alias, entry)
+            image_path.unlink(missing_ok=True)
+            label_path.unlink(missing_ok=True)
+            self.record_manifest_event("remove", name)
+            return [image_path, label_path]
+
+        lines = record["lines"]
+
+        if op == "verify":
+            source_path = Path(record["source"])
+            if recovering and not source_path.exists():
+                # The card is gone: keep a completely copied image, otherwise undo the label.
+                if not image_path.exists():
+                    label_path.unlink(missing_ok=True)
+                    return [label_path]
+                self.write_label(label_path, lines)
+                return [image_path, label_path]
+
+            if not image_path.exists():
+                entry = self.content_index.claim(name, source_path)
+                if entry != name:
+                    # Byte-identical to an existing entry: reuse its image and label.
+                    self.content_index.add_alias(name, entry)
+                    if self.pending_labels.get(name) is lines:
+                        self.pending_labels.pop(name, None)
+                    if not recovering and self.on_reused is not None:
+                        self.on_reused(name, entry)
+                    return []
+
+            # Label first, so the image never appears without one.
+            self.write_label(label_path, lines)
+            self.replace_atomically(image_path, lambda tmp: self.storage.materialize(source_path, tmp))
+            self.record_manifest_event("add", name)
+        else:
+            self.write_label(label_path, lines)
+
+        # Readers switch to the file only if no newer edit is still queued.
+        if self.pending_labels.get(name) is lines:
+            self.pending_labels.pop(name, None)
+
+        return [image_path, label_path]
+
+    def promote_alias(self, name: str, heir: str) -> list[Path]:
+        """Unverify entry name while its alias heir stays verified: the files move to heir.
+
+        Safe to redo: each step is skipped once done, and the index is updated last.
+        """
+        image_path = self.images_dir / name
+        label_path = self.labels_dir / f"{Path(name).stem}.txt"
+        heir_image = self.images_dir / heir
+        heir_label = self.labels_dir / f"{Path(heir).stem}.txt"
+
+        # Label first, so the image never appears without one.
+        if label_path.exists():
+            lines = label_path.read_text(encoding="utf-8").splitlines()
+            self.write_label(heir_label, lines)
+        if image_path.exists():
+            os.replace(image_path, heir_image)
+        label_path.unlink(missing_ok=True)
+
+        self.record_manifest_event("remove", name)
+        self.record_manifest_event("add", heir)
+        self.content_index.promote(name, heir)
+        return [image_path, label_path, heir_image, heir_label]
+
+    def write_label(self, label_path: Path, lines) -> None:
         label_content = "\n".join(lines)
 
         # Keep YOLO label files newline-terminated when non-empty.
         if label_content:
             label_content += "\n"
 
-        label_path.write_text(label_content, encoding="utf-8")
-
-        self.refresh_verified_cache()
-
-        return destination, label_path
+        self.replace_atomically(label_path, lambda tmp: tmp.write_text(label_content, encoding="utf-8"))
+
+    def replace_atomically(self, path: Path, write) -> None:
+        """Write through a hidden temporary file and rename it over path."""
+        tmp = path.with_name(f".{path.name}.part")
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def recover_journal(self):
+        """Redo dataset operations that were journaled but not known to be on disk."""
+        # Temporaries from an interrupted write are never referenced by a finished one.
+        for directory in (self.images_dir, self.labels_dir):
+            for part in directory.glob(".*.part"):
+                part.unlink(missing_ok=True)
+
+        records = self.journal.outstanding()
+        if not records:
+            return
+
+        for record in records:
+            try:
+                paths = self.apply_transaction(record, recovering=True)
+            except Exception as e:
+                print(f"Could not recover dataset {record['op']} of {record['name']}: {e}")
+                paths = []
+            self.journal.mark_applied(record["txn"], paths)
+
+        self.journal.checkpoint()
+        print(f"Recovered {len(records)} dataset operations from the journal")
+
+    def dedupe_dataset(self) -> dict:
+        """Fold byte-identical dataset images into one entry each.
+
+        Duplicates are removed through the journal and kept as aliases, so
+        their sources still show as verified. The entry kept for each group is
+        the one with the most label lines. Returns a small report.
+        """
+        self.flush()
+
+        with os.scandir(self.images_dir) as entries:
+            names = sorted(
+                entry.name for entry in entries
+                if entry.is_file() and not entry.name.startswith(".")
+            )
+
+        by_fast = {}
+        for name in names:
+            by_fast.setdefault(fast_file_digest(self.images_dir / name), []).append(name)
+
+        rows = []
+        records = []
+        bytes_freed = 0
+        for fast, group in by_fast.items():
+            if len(group) == 1:
+                rows.append((group[0], fast, None))
+                continue
+
+            # A shared fast digest is only a hint; prove identity on the full bytes.
+            by_full = {}
+            for name in group:
+                full = full_file_digest(self.images_dir / name)
+                rows.append((name, fast, full))
+                by_full.setdefault(full, []).append(name)
+
+            for same in by_full.values():
+                if len(same) == 1:
+                    continue
+                keep = max(same, key=lambda name: (self.label_line_count(name), -same.index(name)))
+                for name in same:
+                    if name == keep:
+                        continue
+                    stat = os.stat(self.images_dir / name)
+                    # Removing a hardlink frees nothing while the source still exists.
+                    if stat.st_nlink == 1:
+                        bytes_freed += stat.st_size
+                    records.append({"op": "alias", "name": name, "entry": keep})
+
+        self.content_index.register(rows)
+
+        for record in self.journal.log_many(records):
+            self.submit_transaction(record, logged=True)
+        self.flush()
+
+        report = {
+            "scanned": len(names),
+            "duplicates_removed": len(records),
+            "bytes_freed": bytes_freed,
+        }
+        print(f"Dataset dedup: {report}")
+        return report
+
+    def label_line_count(self, name: str) -> int:
+        label_path = self.labels_dir / f"{Path(name).stem}.txt"
+        try:
+            return sum(1 for line in label_path.read_text(encoding="utf-8").splitlines() if line.strip())
+        except OSError:
+            return -1
+
+    def label_path(self, source_path) -> Path:
+        """Label file for a verified source, following aliases to the shared entry."""
+        name = self.content_index.resolve(self.build_full_path_name(Path(source_path)))
+        return self.labels_dir / f"{Path(name).stem}.txt"
+
+    def pending_label_lines(self, source_path):
+        """Label lines queued for a source image but not yet on disk, or None."""
+        name = self.build_full_path_name(Path(source_path))
+        lines = self.pending_labels.get(name)
+        if lines is None and self.pending_labels:
+            # A relabel of an alias is queued under its entry's name.
+            lines = self.pending_labels.get(self.content_index.resolve(name))
+        return lines
+
+    def flush(self, timeout=None) -> bool:
+        """Wait for all queued dataset writes to finish and make them durable."""
+        flushed = self.writer.flush(timeout)
+        if flushed:
+            self.journal.checkpoint()
+        return flushed
+
+    def close(self) -> None:
+        """Finish queued writes and stop the writer threads (for short-lived managers)."""
+        self.writer.close()
+        self.journal.close()
 
     
     def is_verified_cached(self, source_path):
@@ -112,21 +554,13 @@ class TrainingManager:
         return filename in self.verified_cache
 
     def unverify_image(self, source_path):
-        """Remove dataset image and label pair for a previously verified source."""
-        source_path = Path(source_path)
-
-        training_image_path = self.generate_train_name(source_path)
-
-        # Delete image file
-        if training_image_path.exists():
-            training_image_path.unlink()
-
-        # Delete label file
-        label_path = self.labels_dir / f"{training_image_path.stem}.txt"
-
-        if label_path.exists():
-            label_path.unlink()
+        """Queue removal of the dataset image and label pair for a verified source."""
+        name = self.build_full_path_name(Path(source_path))
 
-        self.verified_cache.discard(training_image_path.name)
+        self.verified_cache.discard(name)
+        self.pending_labels.pop(name, None)
 
-        self.refresh_verified_cache()
+        # Runs after any queued verify of the same file.
+        record = {"op": "unverify", "name": name}
+        self.pending_unverifies[name] = record
+        self.submit_transaction(record)